@@ -0,0 +1,238 @@
+"""Time the conversion paths on synthetic inputs.
+
+Fixtures are made with ffmpeg's testsrc2 and sine sources the first time
+they're needed and kept in the fixtures directory. Every case runs a full
+ConversionEngine.run() with libx264 on the CPU, and the wall time of each
+phase (probe, setup, transcode, list, encode, cleanup) is written out as
+JSON so runs from different commits can be compared:
+
+    python benchmarks/bench.py --frames 1000,10000 -o bench.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sequencer.engine import ConversionEngine, ConversionError, ConversionSettings
+from sequencer.pipeline import pillow_available
+from sequencer.probe import get_file_type, get_probe_cache
+from sequencer.system import get_ffmpeg_path
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Case name -> (fixture kind, ConversionSettings overrides)
+CASES = {
+    'png': ('png', {}),
+    'png-list': ('png', {}),  # Every tenth frame dropped, goes through a concat list
+    'png-pipeline': ('png', {'pipeline': True}),
+    'png-chunked': ('png', {'chunked': True}),
+    'jpg': ('jpg', {}),
+    'mixed-res': ('mixed', {}),
+    'h264-copy': ('h264', {}),
+    'h264-transcode': ('h264', {'stream_copy': False}),
+    'h264-single-pass': ('h264', {'stream_copy': False, 'single_pass': True}),
+    'prores': ('prores', {}),
+}
+IMAGE_KINDS = ('png', 'jpg', 'mixed')
+
+def run_ffmpeg(args):
+    subprocess.run(
+        [get_ffmpeg_path(), "-y", "-v", "error"] + args,
+        check=True, stdout=subprocess.DEVNULL
+    )
+
+def testsrc(size, rate=30):
+    return ["-f", "lavfi", "-i", f"testsrc2=size={size}:rate={rate}"]
+
+def make_fixture(directory, kind, frames, size, clips, clip_seconds):
+    """Generate a fixture into directory"""
+    os.makedirs(directory, exist_ok=True)
+    if kind in ('png', 'jpg'):
+        quality = ["-q:v", "3"] if kind == 'jpg' else []
+        run_ffmpeg(testsrc(size) + ["-frames:v", str(frames)] + quality
+                   + [os.path.join(directory, f"f_%06d.{kind}")])
+    elif kind == 'mixed':
+        # First half at the base size, second half at double that
+        width, height = (int(n) for n in size.split("x"))
+        half = frames // 2
+        run_ffmpeg(testsrc(size) + ["-frames:v", str(half),
+                                    os.path.join(directory, "f_%06d.png")])
+        run_ffmpeg(testsrc(f"{width * 2}x{height * 2}")
+                   + ["-frames:v", str(frames - half), "-start_number", str(half + 1),
+                      os.path.join(directory, "f_%06d.png")])
+    else:
+        if kind == 'h264':
+            codec = ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac"]
+            extension = "mp4"
+        else:
+            codec = ["-c:v", "prores_ks", "-profile:v", "2", "-c:a", "pcm_s16le"]
+            extension = "mov"
+        for i in range(clips):
+            run_ffmpeg(
+                testsrc(size)
+                + ["-f", "lavfi", "-i", f"sine=frequency={220 * (i + 1)}:sample_rate=48000",
+                   "-t", str(clip_seconds)] + codec
+                + [os.path.join(directory, f"clip_{i:03d}.{extension}")]
+            )
+
+def fixture_files(root, kind, frames, size, clips, clip_seconds):
+    """Files of a fixture, generating it first if it isn't there yet"""
+    if kind in IMAGE_KINDS:
+        name = f"{kind}-{frames}-{size}"
+    else:
+        name = f"{kind}-{clips}x{clip_seconds}s-{size}"
+    directory = os.path.join(root, name)
+    marker = os.path.join(directory, ".done")
+    if not os.path.exists(marker):
+        shutil.rmtree(directory, ignore_errors=True)
+        print(f"Generating fixture {name}...", file=sys.stderr)
+        make_fixture(directory, kind, frames, size, clips, clip_seconds)
+        open(marker, "w").close()
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if not name.startswith(".")
+    )
+
+def run_case(files, overrides, output_path, cold):
+    if cold:
+        cache = get_probe_cache()
+        if cache:
+            cache.invalidate()
+    settings = ConversionSettings(fps=30, use_gpu=False, encoder="libx264", **overrides)
+    engine = ConversionEngine(files, [get_file_type(f) for f in files], settings)
+    result = {'error': None}
+    start = time.perf_counter()
+    try:
+        # Keep the engine's diagnostics out of the JSON on stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            engine.run(output_path)
+    except ConversionError as e:
+        result['error'] = str(e)
+    result['wall'] = time.perf_counter() - start
+    result['phases'] = engine.phase_times
+    if not result['error']:
+        result['output_bytes'] = os.path.getsize(output_path)
+        os.remove(output_path)
+    return result
+
+def ffmpeg_version():
+    try:
+        output = subprocess.run(
+            [get_ffmpeg_path(), "-version"], capture_output=True, text=True
+        ).stdout
+    except OSError:
+        return None
+    return output.splitlines()[0] if output else None
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+def summarize(runs):
+    """Median wall and phase times over the successful runs"""
+    ok = [run for run in runs if not run['error']]
+    if not ok:
+        return None
+    phases = sorted({name for run in ok for name in run['phases']})
+    return {
+        'wall': statistics.median(run['wall'] for run in ok),
+        'phases': {name: statistics.median(run['phases'].get(name, 0.0) for run in ok)
+                   for name in phases},
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", default=",".join(CASES),
+                        help=f"comma separated cases to run (default: all of {', '.join(CASES)})")
+    parser.add_argument("--frames", default="1000",
+                        help="comma separated image sequence lengths (default 1000)")
+    parser.add_argument("--size", default="640x360", help="fixture frame size (default 640x360)")
+    parser.add_argument("--clips", type=int, default=4, help="clips per video fixture (default 4)")
+    parser.add_argument("--clip-seconds", type=int, default=5,
+                        help="length of each fixture clip (default 5)")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case (default 1)")
+    parser.add_argument("--cold", action="store_true",
+                        help="clear the probe cache before every run")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES,
+                        help="where generated fixtures are kept")
+    parser.add_argument("-o", "--output", help="write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    cases = [name.strip() for name in args.cases.split(",") if name.strip()]
+    unknown = [name for name in cases if name not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+    frame_counts = [int(n) for n in args.frames.split(",")]
+
+    results = []
+    output_dir = tempfile.mkdtemp(prefix="sequence-to-video-bench-")
+    try:
+        for name in cases:
+            kind, overrides = CASES[name]
+            if overrides.get('pipeline') and not pillow_available():
+                print(f"Skipping {name}, Pillow isn't installed", file=sys.stderr)
+                continue
+            for frames in frame_counts if kind in IMAGE_KINDS else [None]:
+                try:
+                    files = fixture_files(
+                        args.fixtures, kind, frames, args.size, args.clips, args.clip_seconds
+                    )
+                except subprocess.CalledProcessError as e:
+                    print(f"Skipping {name}, could not make its fixture: {e}", file=sys.stderr)
+                    break
+                if name == 'png-list':
+                    files = [f for i, f in enumerate(files) if i % 10 != 9]
+                label = f"{name} ({frames} frames)" if frames else name
+                runs = []
+                for attempt in range(args.repeat):
+                    print(f"Running {label}, {attempt + 1}/{args.repeat}", file=sys.stderr)
+                    runs.append(run_case(
+                        files, overrides, os.path.join(output_dir, "out.mp4"), args.cold
+                    ))
+                    if runs[-1]['error']:
+                        print(f"{label} failed: {runs[-1]['error']}", file=sys.stderr)
+                results.append({
+                    'case': name,
+                    'inputs': len(files),
+                    'frames': frames,
+                    'settings': overrides,
+                    'runs': runs,
+                    'median': summarize(runs),
+                })
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    report = {
+        'commit': git_commit(),
+        'ffmpeg': ffmpeg_version(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'time': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'args': vars(args),
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 1 if any(run['error'] for result in results for run in result['runs']) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,7 +19,7 @@ a = Analysis(
         (tkinterdnd2_path, 'tkinterdnd2'),
         (os.path.join(tkinterdnd2_path, 'tkdnd'), 'tkdnd')
     ],
-    hiddenimports=['tkinterdnd2'],
+    hiddenimports=['tkinterdnd2', 'sequencer.gui'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
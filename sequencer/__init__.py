@@ -0,0 +1,7 @@
+"""Image sequence / video clip to MP4 conversion.
+
+The engine and probing helpers have no GUI dependencies; Tk is only
+imported by sequencer.gui.
+"""
+from .engine import ConversionEngine, ConversionError, ConversionSettings
+from .probe import probe_files
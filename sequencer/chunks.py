@@ -0,0 +1,162 @@
+"""Split long image timelines into chunks that are encoded in parallel.
+
+Every chunk is a whole number of GOPs and is encoded with the same
+settings and a fixed keyframe interval, so the encoded chunks can be
+joined with a stream copy and play back as one continuous video.
+"""
+import math
+import queue
+import threading
+
+from .ffmpeg import FFmpegProcess
+from .worker import LocalWorker
+
+# Chunks per worker, so a slow chunk near the end doesn't leave cores idle
+CHUNKS_PER_WORKER = 2
+
+# GOPs per chunk in incremental mode. Fixed so chunk boundaries don't move
+# between runs on machines with different core counts.
+INCREMENTAL_CHUNK_GOPS = 5
+
+def gop_size(fps):
+    """Keyframe interval in frames, about two seconds"""
+    return max(1, round(fps * 2))
+
+def gop_args(gop):
+    """Encoder options for a fixed keyframe interval with no scene cut keyframes"""
+    return ["-g", str(gop), "-keyint_min", str(gop), "-sc_threshold", "0"]
+
+def plan_chunks(frame_count, gop, workers, chunk_frames=None):
+    """[(first frame, frame count)] covering frame_count frames.
+
+    chunk_frames is rounded up to a whole number of GOPs. By default the
+    frames are spread over CHUNKS_PER_WORKER chunks per worker.
+    """
+    if not chunk_frames:
+        chunk_frames = math.ceil(frame_count / (workers * CHUNKS_PER_WORKER))
+    chunk_frames = max(gop, math.ceil(chunk_frames / gop) * gop)
+    return [(start, min(chunk_frames, frame_count - start))
+            for start in range(0, frame_count, chunk_frames)]
+
+class ChunkRunner:
+    """Runs a list of (chunk index, ffmpeg command) pairs, workers at a time.
+
+    The commands run as direct ffmpeg children, or on LocalWorker
+    processes when use_workers is set. on_progress(index, frames done) is
+    called as each chunk advances, on_finished(index) when one succeeds
+    and on_stats(index, stats) with FFmpegProcess.stats() when one exits.
+    The first failure stops everything and run() returns (chunk index,
+    error output) for it, or None on success.
+    """
+
+    def __init__(self, commands, workers, on_progress=None, on_finished=None,
+                 use_workers=False, on_stats=None):
+        self.commands = commands
+        self.workers = max(1, min(workers, len(commands)))
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.use_workers = use_workers
+        self.on_stats = on_stats
+        self.pending = queue.Queue()
+        self.failed = threading.Event()
+        self.errors = []
+        self.lock = threading.Lock()
+        self.running = set()  # FFmpegProcess or LocalWorker objects
+        self.paused = False
+
+    def report(self, index, frame):
+        if self.on_progress and frame is not None:
+            self.on_progress(index, frame)
+
+    def track(self, process):
+        """Add a process to the running set, catching up on pause or stop"""
+        with self.lock:
+            self.running.add(process)
+            if self.failed.is_set():
+                process.kill()
+            elif self.paused:
+                process.suspend()
+
+    def run_direct(self, index, cmd):
+        process = FFmpegProcess(cmd, on_progress=lambda event: self.report(index, event.frame))
+        self.track(process)
+        try:
+            returncode = process.wait()
+        finally:
+            with self.lock:
+                self.running.discard(process)
+        if self.on_stats:
+            self.on_stats(index, process.stats())
+        return returncode, process.error_output()
+
+    def worker_loop(self):
+        worker = None
+        try:
+            while not self.failed.is_set():
+                try:
+                    index, cmd = self.pending.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    if self.use_workers and worker is None:
+                        worker = LocalWorker()
+                        self.track(worker)
+                    if worker:
+                        returncode, error = worker.run(
+                            index, cmd,
+                            on_progress=lambda message, i=index: self.report(i, message.get('frame'))
+                        )
+                        if self.on_stats and worker.stats:
+                            self.on_stats(index, worker.stats)
+                    else:
+                        returncode, error = self.run_direct(index, cmd)
+                except Exception as e:
+                    # e.g. ffmpeg or the scratch directory has gone missing
+                    returncode, error = None, str(e)
+                if returncode != 0:
+                    if not self.failed.is_set():
+                        self.errors.append((index, error))
+                    self.stop()
+                    return
+                if self.on_finished:
+                    self.on_finished(index)
+        finally:
+            if worker:
+                with self.lock:
+                    self.running.discard(worker)
+                worker.close()
+
+    def stop(self):
+        """Drop the queued chunks and kill the running ones"""
+        self.failed.set()
+        with self.lock:
+            for process in self.running:
+                process.kill()
+
+    # So the engine can stop a runner like any other process it tracks
+    kill = stop
+
+    def suspend(self):
+        with self.lock:
+            self.paused = True
+            for process in self.running:
+                process.suspend()
+
+    def resume(self):
+        with self.lock:
+            self.paused = False
+            for process in self.running:
+                process.resume()
+
+    def run(self):
+        for item in self.commands:
+            self.pending.put(item)
+        threads = [threading.Thread(target=self.worker_loop, daemon=True)
+                   for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if self.errors:
+            return self.errors[0]
+        return None
@@ -0,0 +1,283 @@
+import argparse
+import glob
+import os
+import re
+import sys
+import threading
+import time
+
+from .conform import CONFORM_MODES, SCALERS
+from .encoders import get_capabilities
+from .engine import ConversionSettings
+from .events import EventLog
+from .jobs import CANCELLED, DONE, FAILED, RUNNING, Job, JobQueue, format_duration
+from .probe import IMAGE_EXTENSIONS, VIDEO_EXTENSIONS, get_file_type, get_probe_cache
+from .segments import get_segment_cache
+
+def natural_key(path):
+    """Sort key that orders shot_2.png before shot_10.png"""
+    return [int(part) if part.isdigit() else part.lower()
+            for part in re.split(r'(\d+)', path)]
+
+def expand_inputs(inputs):
+    """Turn files, directories and glob patterns into a sorted list of media files"""
+    media_extensions = IMAGE_EXTENSIONS + VIDEO_EXTENSIONS
+    files = []
+    for entry in inputs:
+        if os.path.isdir(entry):
+            matches = [
+                os.path.join(entry, name) for name in os.listdir(entry)
+                if os.path.splitext(name)[1].lower() in media_extensions
+            ]
+        elif glob.has_magic(entry):
+            matches = glob.glob(entry)
+        else:
+            files.append(entry)
+            continue
+        files.extend(sorted(matches, key=natural_key))
+    return files
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="sequence-to-video",
+        description="Convert image sequences and video clips into a single MP4. "
+                    "Starts the GUI when no inputs are given."
+    )
+    parser.add_argument("inputs", nargs="*",
+                        help="media files, directories or glob patterns, in timeline order")
+    parser.add_argument("-o", "--output", help="output MP4 path")
+    parser.add_argument("--each", action="store_true",
+                        help="make one video per input instead of joining them, "
+                             "written to --output-dir")
+    parser.add_argument("--output-dir", help="directory for --each outputs")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of videos to encode at once (default 1)")
+    parser.add_argument("--threads", type=int,
+                        help="total CPU threads shared between running jobs "
+                             "(default: all cores)")
+    parser.add_argument("--fps", type=float, default=30, help="output frame rate (default 30)")
+    parser.add_argument("--bitrate", type=int, default=20000,
+                        help="video bitrate in kbps (default 20000)")
+    parser.add_argument("--resolution", default="",
+                        help="output size as WIDTHxHEIGHT (default: largest input)")
+    parser.add_argument("--conform", default="fit", choices=CONFORM_MODES,
+                        help="how inputs of another shape fit the output: letterboxed, "
+                             "stretched or cropped (default fit)")
+    parser.add_argument("--scaler", default="lanczos", choices=SCALERS,
+                        help="scaling algorithm for resized inputs (default lanczos)")
+    parser.add_argument("--target-size", type=float,
+                        help="pick the bitrate to hit this output size")
+    parser.add_argument("--size-unit", choices=["MB", "KB"], default="MB",
+                        help="unit for --target-size (default MB)")
+    parser.add_argument("--encoder", default="auto",
+                        help="ffmpeg video encoder, e.g. libx264 or h264_nvenc "
+                             "(default auto: the first working GPU encoder, else libx264)")
+    parser.add_argument("--no-gpu", action="store_true",
+                        help="never pick a GPU encoder automatically")
+    parser.add_argument("--hwaccel", default="auto", choices=["auto", "off", "cuda", "vaapi", "qsv"],
+                        help="decode and scale clips on the GPU (default auto: on the "
+                             "hardware encoder's device when it passed detection)")
+    parser.add_argument("--no-stream-copy", action="store_true",
+                        help="always re-encode, even when inputs already match the output format")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="decode images on a worker pool and pipe raw frames to ffmpeg "
+                             "(needs Pillow)")
+    parser.add_argument("--decode-workers", type=int,
+                        help="worker processes for --pipeline "
+                             "(default: the job's share of the threads)")
+    parser.add_argument("--single-pass", action="store_true",
+                        help="conform and join every input in one ffmpeg with a concat "
+                             "filter instead of transcoding clips to temp files")
+    parser.add_argument("--chunked", action="store_true",
+                        help="encode image timelines as GOP aligned chunks in parallel "
+                             "and join them without re-encoding")
+    parser.add_argument("--chunk-frames", type=int,
+                        help="frames per chunk for --chunked, rounded up to whole GOPs "
+                             "(default: two chunks per worker)")
+    parser.add_argument("--chunk-workers", type=int,
+                        help="chunks encoded at once (default: --threads or all cores)")
+    parser.add_argument("--worker-processes", action="store_true",
+                        help="run --chunked chunks on local worker processes")
+    parser.add_argument("--incremental", action="store_true",
+                        help="like --chunked, but keep encoded chunks and only re-encode "
+                             "the ones whose images changed since the last run")
+    parser.add_argument("--scratch-dir",
+                        help="where jobs keep their intermediate files, e.g. a fast local "
+                             "disk or /dev/shm (default: $SEQUENCE_TO_VIDEO_SCRATCH or the "
+                             "system temp dir)")
+    parser.add_argument("--event-log",
+                        help="append per-phase timings, per-ffmpeg resource use and a "
+                             "summary for every job to this file as JSON lines")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("-q", "--quiet", action="store_true", help="don't print progress")
+    parser.add_argument("--clear-probe-cache", action="store_true",
+                        help="invalidate all cached probe results and exit")
+    parser.add_argument("--clear-segment-cache", action="store_true",
+                        help="delete all chunks kept by --incremental and exit")
+    parser.add_argument("--list-encoders", action="store_true",
+                        help="detect the encoders ffmpeg can use again, list them and exit")
+    return parser, parser.parse_args(argv)
+
+def job_name(entry):
+    """Output name for an input when running with --each"""
+    if glob.has_magic(entry):
+        entry = os.path.dirname(entry) or "output"
+    entry = os.path.normpath(entry)
+    if os.path.isdir(entry):
+        return os.path.basename(os.path.abspath(entry))
+    return os.path.splitext(os.path.basename(entry))[0]
+
+def make_job(parser, files, settings, output_path):
+    if not files:
+        parser.error(f"no media files found for {output_path}")
+    file_types = [get_file_type(f) for f in files]
+    if len(set(file_types)) > 1:
+        parser.error("cannot mix images and videos, please use only one type of media")
+    return Job(files, file_types, settings, output_path)
+
+class ProgressReporter:
+    """Prints job status changes and a periodic progress line to stderr"""
+
+    def __init__(self, quiet=False, interval=1.0):
+        self.quiet = quiet
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.statuses = {}
+        self.last_report = 0.0
+
+    def __call__(self, job):
+        if self.quiet and job.status != FAILED:
+            return
+        with self.lock:
+            if self.statuses.get(job.id) != job.status:
+                self.statuses[job.id] = job.status
+                if job.status == DONE:
+                    elapsed = format_duration(job.end_time - job.start_time)
+                    sys.stderr.write(f"[{job.name}] done in {elapsed}\n")
+                elif job.status == FAILED:
+                    sys.stderr.write(f"[{job.name}] failed: {job.error}\n")
+                elif job.status == CANCELLED:
+                    sys.stderr.write(f"[{job.name}] cancelled\n")
+                elif job.status == RUNNING:
+                    sys.stderr.write(f"[{job.name}] started\n")
+                return
+
+            now = time.time()
+            if job.status != RUNNING or now - self.last_report < self.interval:
+                return
+            self.last_report = now
+            eta = format_duration(job.eta) if job.eta is not None else "--:--"
+            speed = f" {job.speed:.2f}x" if job.speed else ""
+            sys.stderr.write(
+                f"[{job.name}] {job.status_text} ({job.progress:.1f}%){speed} ETA {eta}\n"
+            )
+
+def run_batch(parser, args):
+    settings = ConversionSettings(
+        fps=args.fps,
+        bitrate=args.bitrate,
+        resolution=args.resolution,
+        target_size=args.target_size,
+        size_unit=args.size_unit,
+        use_gpu=not args.no_gpu,
+        encoder=None if args.encoder == "auto" else args.encoder,
+        stream_copy=not args.no_stream_copy,
+        pipeline=args.pipeline,
+        decode_workers=args.decode_workers,
+        single_pass=args.single_pass,
+        chunked=args.chunked,
+        chunk_frames=args.chunk_frames,
+        chunk_workers=args.chunk_workers,
+        chunk_processes=args.worker_processes,
+        incremental=args.incremental,
+        scratch_dir=args.scratch_dir,
+        hwaccel=args.hwaccel,
+        conform=args.conform,
+        scaler=args.scaler
+    )
+
+    jobs = []
+    if args.each:
+        if not args.output_dir:
+            parser.error("--output-dir is required with --each")
+        os.makedirs(args.output_dir, exist_ok=True)
+        used_names = set()
+        for entry in args.inputs:
+            name = base = job_name(entry)
+            suffix = 2
+            while name in used_names:
+                name = f"{base}_{suffix}"
+                suffix += 1
+            used_names.add(name)
+            output_path = os.path.join(args.output_dir, f"{name}.mp4")
+            jobs.append(make_job(parser, expand_inputs([entry]), settings, output_path))
+    else:
+        if not args.output:
+            parser.error("--output is required in batch mode")
+        jobs.append(make_job(parser, expand_inputs(args.inputs), settings, args.output))
+
+    event_log = EventLog(args.event_log) if args.event_log else None
+    job_queue = JobQueue(
+        max_workers=args.jobs,
+        thread_budget=args.threads,
+        on_update=ProgressReporter(quiet=args.quiet),
+        on_event=event_log
+    )
+    for job in jobs:
+        job_queue.submit(job)
+    try:
+        job_queue.wait()
+    except KeyboardInterrupt:
+        # ffmpeg runs in its own process group and doesn't see the Ctrl+C,
+        # stop it here so partial outputs and temp files get cleaned up
+        sys.stderr.write("Cancelling...\n")
+        job_queue.cancel_all()
+        job_queue.wait()
+        return 130
+    finally:
+        if event_log:
+            event_log.close()
+
+    failed = [job for job in jobs if job.status == FAILED]
+    if len(jobs) > 1 and not args.quiet:
+        sys.stderr.write(f"{len(jobs) - len(failed)}/{len(jobs)} videos written\n")
+    return 1 if failed else 0
+
+def main(argv=None):
+    parser, args = parse_args(sys.argv[1:] if argv is None else argv)
+
+    if args.worker:
+        # Started by the chunked encoder in frozen builds
+        from .worker import serve
+        serve()
+        return 0
+
+    if args.clear_probe_cache:
+        cache = get_probe_cache()
+        if cache:
+            cache.invalidate()
+            print(f"Cleared probe cache at {cache.db_path}")
+        return 0
+
+    if args.clear_segment_cache:
+        cache = get_segment_cache()
+        if cache:
+            cache.clear()
+            print(f"Cleared segment cache at {cache.directory}")
+        return 0
+
+    if args.list_encoders:
+        capabilities = get_capabilities(refresh=True)
+        print(f"Working encoders: {', '.join(sorted(capabilities.working)) or 'none'}")
+        print(f"Hardware decoders: {', '.join(sorted(capabilities.hwaccels)) or 'none'}")
+        print(f"GPU decode and scaling: {', '.join(sorted(capabilities.hw_paths)) or 'none'}")
+        return 0
+
+    if args.inputs:
+        return run_batch(parser, args)
+
+    # Only pull in Tk when we actually need a window
+    from .gui import ImageToVideoConverter
+    app = ImageToVideoConverter()
+    app.run()
+    return 0
@@ -0,0 +1,79 @@
+"""Filter graphs that bring every input to the output's size, rate and format.
+
+Inputs are conformed in the same ffmpeg pass that encodes them, so mixed
+sizes and aspect ratios don't need an extra trip through temp files.
+How a frame of a different shape is made to fit:
+
+    fit   scale it to fit inside the frame and letterbox the rest (default)
+    fill  stretch it to exactly the frame size
+    crop  scale it to cover the frame and cut off what overflows
+
+Output dimensions are rounded down to even numbers, which yuv420p needs.
+"""
+
+CONFORM_MODES = ('fit', 'fill', 'crop')
+SCALERS = ('lanczos', 'bicubic', 'bilinear', 'spline', 'area', 'neighbor')
+
+# Size differences small enough that stretching instead of padding or
+# cropping can't be seen
+SHAPE_TOLERANCE = 2
+
+def even_size(size):
+    """(width, height) rounded down to even numbers, or None"""
+    if not size:
+        return None
+    return tuple(max(2, n - n % 2) for n in size)
+
+def scaled_size(source, size, mode='fit'):
+    """Size a source (width, height) is scaled to before padding or cropping"""
+    if mode == 'fill':
+        return size
+    pick = max if mode == 'crop' else min
+    scale = pick(size[0] / source[0], size[1] / source[1])
+    return even_size((round(source[0] * scale), round(source[1] * scale)))
+
+def stretch_matches(source, size, mode='fit'):
+    """Whether a plain scale to size looks the same as mode for a source.
+
+    GPU scalers can only stretch, so they're only used when this holds.
+    """
+    if size is None or mode == 'fill':
+        return True
+    if not source or not all(source):
+        return False
+    scaled = scaled_size(source, size, mode)
+    return all(abs(a - b) <= SHAPE_TOLERANCE for a, b in zip(scaled, size))
+
+def scale_filters(size, mode='fit', scaler='lanczos'):
+    """Software filters that make a frame of any shape exactly size"""
+    width, height = size
+    options = f"flags={scaler}"
+    if mode == 'fill':
+        return [f"scale={width}:{height}:{options}"]
+    options += ":force_divisible_by=2"
+    if mode == 'crop':
+        return [
+            f"scale={width}:{height}:force_original_aspect_ratio=increase:{options}",
+            f"crop={width}:{height}",
+        ]
+    return [
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease:{options}",
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2",
+    ]
+
+def conform_filter(size, fps, mode='fit', scaler='lanczos', pix_fmt='yuv420p'):
+    """One filter chain converting the frame rate, size and pixel format.
+
+    size None keeps every frame's own size, pix_fmt None leaves the
+    format for a later filter to set.
+    """
+    if mode not in CONFORM_MODES:
+        raise ValueError(f"Unknown conform mode {mode!r}")
+    # Frames the rate conversion drops never get scaled
+    chain = [f"fps={fps:g}"]
+    if size:
+        chain.extend(scale_filters(even_size(size), mode, scaler))
+    chain.append("setsar=1")
+    if pix_fmt:
+        chain.append(f"format={pix_fmt}")
+    return ",".join(chain)
@@ -0,0 +1,321 @@
+"""Find out which video encoders this ffmpeg build can actually use.
+
+ffmpeg lists hardware encoders whether or not the machine has the
+hardware, so each listed hardware encoder is tried with a tiny test
+encode, and each hardware decode/scale path with a tiny upload, scale
+and download. The result is saved next to the probe cache and only redone when
+the ffmpeg binary changes, so conversions never pay for detection.
+"""
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+
+from .system import CREATE_NO_WINDOW, get_data_dir, get_ffmpeg_path
+
+# Render node used for VAAPI on Linux
+VAAPI_DEVICE = "/dev/dri/renderD128"
+
+# Every encoder we know how to drive, fastest first within each codec.
+# hwaccel is None for software encoders.
+ENCODERS = {
+    'h264_nvenc': {'codec': 'h264', 'hwaccel': 'nvenc'},
+    'h264_qsv': {'codec': 'h264', 'hwaccel': 'qsv'},
+    'h264_vaapi': {'codec': 'h264', 'hwaccel': 'vaapi'},
+    'h264_videotoolbox': {'codec': 'h264', 'hwaccel': 'videotoolbox'},
+    'libx264': {'codec': 'h264', 'hwaccel': None},
+    'hevc_nvenc': {'codec': 'hevc', 'hwaccel': 'nvenc'},
+    'hevc_qsv': {'codec': 'hevc', 'hwaccel': 'qsv'},
+    'hevc_vaapi': {'codec': 'hevc', 'hwaccel': 'vaapi'},
+    'hevc_videotoolbox': {'codec': 'hevc', 'hwaccel': 'videotoolbox'},
+    'libx265': {'codec': 'hevc', 'hwaccel': None},
+    'av1_nvenc': {'codec': 'av1', 'hwaccel': 'nvenc'},
+    'av1_qsv': {'codec': 'av1', 'hwaccel': 'qsv'},
+    'av1_vaapi': {'codec': 'av1', 'hwaccel': 'vaapi'},
+    'libsvtav1': {'codec': 'av1', 'hwaccel': None},
+    'libaom-av1': {'codec': 'av1', 'hwaccel': None},
+}
+
+# Ways to decode and scale on a GPU, by -hwaccel name. family is the
+# ENCODERS hwaccel of the encoders on the same device, which can take the
+# scaled frames without them leaving GPU memory.
+HW_PATHS = {
+    'cuda': {
+        'family': 'nvenc',
+        'device': "cuda=hw",
+        'upload': "hwupload",
+        'scale': "scale_cuda=w={width}:h={height}",
+    },
+    'vaapi': {
+        'family': 'vaapi',
+        'device': f"vaapi=hw:{VAAPI_DEVICE}",
+        'upload': "hwupload",
+        'scale': "scale_vaapi=w={width}:h={height}:format=nv12",
+    },
+    'qsv': {
+        'family': 'qsv',
+        'device': "qsv=hw",
+        'upload': "hwupload=extra_hw_frames=64",
+        'scale': "scale_qsv=w={width}:h={height}",
+    },
+}
+
+# Software encoders that support ffmpeg's -pass 1/-pass 2
+TWO_PASS_ENCODERS = {'libx264', 'libaom-av1'}
+
+def encoder_codec(encoder):
+    """Codec name ffprobe reports for streams made by an ffmpeg encoder"""
+    if encoder in ENCODERS:
+        return ENCODERS[encoder]['codec']
+    if encoder.startswith("h264"):
+        return "h264"
+    if encoder.startswith("hevc"):
+        return "hevc"
+    if "av1" in encoder:
+        return "av1"
+    return encoder
+
+def is_hardware(encoder):
+    return bool(ENCODERS.get(encoder, {}).get('hwaccel'))
+
+def device_args(encoder):
+    """Global options an encoder needs before the first -i"""
+    if encoder.endswith("_vaapi"):
+        return ["-vaapi_device", VAAPI_DEVICE]
+    return []
+
+def upload_filter(encoder):
+    """Filter that moves frames onto the GPU for encoders that need it, or None"""
+    if encoder.endswith("_vaapi"):
+        return "format=nv12,hwupload"
+    return None
+
+def hw_device_args(method):
+    """Global options that open the device for a HW_PATHS method, named hw"""
+    return ["-init_hw_device", HW_PATHS[method]['device'], "-filter_hw_device", "hw"]
+
+def hw_decode_args(method):
+    """Input options that decode on the device and leave the frames there"""
+    return ["-hwaccel", method, "-hwaccel_device", "hw", "-hwaccel_output_format", method]
+
+def hw_scale_filter(method, size=None, on_device=False, download=False):
+    """Filter chain that scales on the device.
+
+    Frames that were decoded in software are uploaded first unless
+    on_device is set. download brings the result back for a software
+    encoder. Returns "" when there's nothing to do.
+    """
+    path = HW_PATHS[method]
+    chain = []
+    if not on_device:
+        chain.extend(["format=nv12", path['upload']])
+    if size:
+        chain.append(path['scale'].format(width=size[0], height=size[1]))
+    if download:
+        chain.extend(["hwdownload", "format=nv12", "format=yuv420p"])
+    return ",".join(chain)
+
+def parse_encoders(output):
+    """Video encoder names from `ffmpeg -encoders` output"""
+    names = set()
+    for line in output.splitlines():
+        match = re.match(r"^\s*V[A-Z.]{5}\s+(\S+)", line)
+        if match and match.group(1) != "=":
+            names.add(match.group(1))
+    return names
+
+def parse_hwaccels(output):
+    """Method names from `ffmpeg -hwaccels` output"""
+    lines = output.splitlines()
+    for i, line in enumerate(lines):
+        if line.strip().startswith("Hardware acceleration methods"):
+            return {name.strip() for name in lines[i + 1:] if name.strip()}
+    return set()
+
+def run_ffmpeg(args, timeout=30):
+    result = subprocess.run(
+        [get_ffmpeg_path()] + args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        timeout=timeout,
+        creationflags=CREATE_NO_WINDOW
+    )
+    return result.returncode, result.stdout
+
+def test_encoder(encoder):
+    """Whether a one frame encode with this encoder succeeds"""
+    args = ["-hide_banner", "-v", "error"] + device_args(encoder) + [
+        "-f", "lavfi", "-i", "color=black:size=256x256:rate=30:duration=0.1",
+        "-frames:v", "1",
+    ]
+    if upload_filter(encoder):
+        args.extend(["-vf", upload_filter(encoder)])
+    args.extend(["-c:v", encoder, "-f", "null", "-"])
+    try:
+        returncode, _ = run_ffmpeg(args)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return returncode == 0
+
+def test_hw_path(method):
+    """Whether frames can be uploaded, scaled and downloaded with a HW_PATHS method"""
+    args = ["-hide_banner", "-v", "error"] + hw_device_args(method) + [
+        "-f", "lavfi", "-i", "color=black:size=256x256:rate=30:duration=0.1",
+        "-frames:v", "1",
+        "-vf", hw_scale_filter(method, (128, 128), download=True),
+        "-f", "null", "-"
+    ]
+    try:
+        returncode, _ = run_ffmpeg(args)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return returncode == 0
+
+def ffmpeg_identity():
+    """Path, size and mtime of the ffmpeg binary, used as the cache key"""
+    path = shutil.which(get_ffmpeg_path()) or get_ffmpeg_path()
+    try:
+        st = os.stat(path)
+        return [os.path.abspath(path), st.st_size, st.st_mtime_ns]
+    except OSError:
+        return None
+
+class Capabilities:
+    """What the installed ffmpeg can encode with.
+
+    encoders holds every video encoder the build lists, working the known
+    ones that passed a test encode. hw_paths are the HW_PATHS methods that
+    passed a test scale.
+    """
+    VERSION = 2
+
+    def __init__(self, encoders=(), hwaccels=(), working=(), identity=None, hw_paths=()):
+        self.encoders = set(encoders)
+        self.hwaccels = set(hwaccels)
+        self.working = set(working)
+        self.identity = identity
+        self.hw_paths = set(hw_paths)
+
+    @classmethod
+    def detect(cls):
+        identity = ffmpeg_identity()
+        try:
+            _, encoder_output = run_ffmpeg(["-hide_banner", "-encoders"])
+            _, hwaccel_output = run_ffmpeg(["-hide_banner", "-hwaccels"])
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"Could not list ffmpeg encoders: {e}")
+            return cls(identity=identity)
+        encoders = parse_encoders(encoder_output)
+        working = set()
+        for name in ENCODERS:
+            if name not in encoders:
+                continue
+            # Software encoders always work if they're compiled in
+            if not is_hardware(name) or test_encoder(name):
+                working.add(name)
+        hwaccels = parse_hwaccels(hwaccel_output)
+        hw_paths = {method for method in HW_PATHS
+                    if method in hwaccels and test_hw_path(method)}
+        return cls(encoders, hwaccels, working, identity, hw_paths)
+
+    def to_dict(self):
+        return {
+            'version': self.VERSION,
+            'identity': self.identity,
+            'encoders': sorted(self.encoders),
+            'hwaccels': sorted(self.hwaccels),
+            'working': sorted(self.working),
+            'hw_paths': sorted(self.hw_paths),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['encoders'], data['hwaccels'], data['working'], data['identity'],
+                   data['hw_paths'])
+
+    def hardware_encoders(self, codec='h264'):
+        return [name for name, info in ENCODERS.items()
+                if info['codec'] == codec and info['hwaccel'] and name in self.working]
+
+    def choose(self, codec='h264', use_gpu=True):
+        """Best working encoder for a codec, preferring hardware if use_gpu"""
+        for name, info in ENCODERS.items():
+            if info['codec'] != codec or name not in self.working:
+                continue
+            if info['hwaccel'] and not use_gpu:
+                continue
+            return name
+        # Let ffmpeg explain what's missing rather than guessing here
+        return {'h264': 'libx264', 'hevc': 'libx265', 'av1': 'libsvtav1'}.get(codec, codec)
+
+    def hw_path(self, encoder, requested='auto'):
+        """HW_PATHS method to decode and scale with for encoder, or None for software.
+
+        'auto' uses the encoder's own device if its path passed the test,
+        'off' never uses one. Naming a method forces it for software
+        encoders or ones on that device; if it doesn't work the engine
+        falls back to software when ffmpeg fails.
+        """
+        family = ENCODERS.get(encoder, {}).get('hwaccel')
+        if requested == 'off':
+            return None
+        if requested == 'auto':
+            for method, path in HW_PATHS.items():
+                if path['family'] == family and method in self.hw_paths:
+                    return method
+            return None
+        if requested in HW_PATHS and family in (None, HW_PATHS[requested]['family']):
+            return requested
+        return None
+
+    def check(self, encoder):
+        """Error message if encoder can't be used, otherwise None"""
+        if not self.encoders:
+            # Detection failed, leave it to ffmpeg
+            return None
+        if encoder not in self.encoders:
+            return f"Encoder {encoder} is not available in this ffmpeg build"
+        if encoder in ENCODERS and encoder not in self.working:
+            return f"Encoder {encoder} failed its test encode, is the hardware present?"
+        return None
+
+def capabilities_path():
+    return os.path.join(get_data_dir(), 'encoders.json')
+
+def load_capabilities(identity):
+    try:
+        with open(capabilities_path(), encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == Capabilities.VERSION and data.get('identity') == identity:
+            return Capabilities.from_dict(data)
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+def save_capabilities(capabilities):
+    try:
+        with open(capabilities_path(), "w", encoding='utf-8') as f:
+            json.dump(capabilities.to_dict(), f)
+    except OSError as e:
+        print(f"Could not save encoder capabilities: {e}")
+
+_capabilities = None
+_capabilities_lock = threading.Lock()
+
+def get_capabilities(refresh=False):
+    """Encoder capabilities, detected once and then read from disk"""
+    global _capabilities
+    with _capabilities_lock:
+        if _capabilities is None or refresh:
+            identity = ffmpeg_identity()
+            capabilities = None if refresh else load_capabilities(identity)
+            if capabilities is None:
+                capabilities = Capabilities.detect()
+                if capabilities.encoders:
+                    save_capabilities(capabilities)
+            _capabilities = capabilities
+        return _capabilities
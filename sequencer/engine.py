@@ -0,0 +1,1485 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+
+from .chunks import INCREMENTAL_CHUNK_GOPS, ChunkRunner, gop_args, gop_size, plan_chunks
+from .conform import conform_filter, even_size, stretch_matches
+from .encoders import (TWO_PASS_ENCODERS, device_args, encoder_codec, get_capabilities,
+                       hw_decode_args, hw_device_args, hw_scale_filter, is_hardware,
+                       upload_filter)
+from .events import UsageTotals, format_summary
+from .ffmpeg import FFmpegProcess
+from .pipeline import FramePipeline, pillow_available
+from .probe import probe_files
+from .segments import get_segment_cache
+from .system import available_memory, get_data_dir, get_ffmpeg_path, open_file_limit
+from .timeline import Timeline
+from .workspace import Workspace
+
+class ConversionError(Exception):
+    """Raised when ffmpeg fails or the job can't be set up"""
+
+class ConversionCancelled(ConversionError):
+    """Raised by ConversionEngine.run() after cancel() was called"""
+
+class ConversionSettings:
+    """Everything the engine needs to know about the output video"""
+
+    def __init__(self, fps=30, bitrate=20000, resolution="", target_size=None,
+                 size_unit="MB", use_gpu=True, encoder=None, threads=None,
+                 transcode_workers=None, stream_copy=True, pipeline=False,
+                 decode_workers=None, chunked=False, chunk_frames=None,
+                 chunk_workers=None, chunk_processes=False, incremental=False,
+                 scratch_dir=None, hwaccel='auto', conform='fit', scaler='lanczos',
+                 single_pass=False):
+        self.fps = float(fps)
+        self.bitrate = int(bitrate)  # kbps
+        self.resolution = resolution or ""  # Empty means original size
+        self.target_size = target_size  # None means no target size
+        self.size_unit = size_unit  # MB or KB
+        self.use_gpu = use_gpu
+        self.encoder = encoder  # None picks GPU/CPU automatically
+        self.threads = threads  # ffmpeg -threads, None lets ffmpeg decide
+        self.transcode_workers = transcode_workers  # None sizes the pool from threads
+        self.stream_copy = stream_copy  # Skip re-encoding inputs that already match
+        self.pipeline = pipeline  # Decode images in-process and pipe raw frames to ffmpeg
+        self.decode_workers = decode_workers  # None uses the thread budget, or every core
+        self.chunked = chunked  # Encode image timelines as parallel chunks
+        self.chunk_frames = chunk_frames  # None picks a size from the worker count
+        self.chunk_workers = chunk_workers  # None uses the thread budget
+        self.chunk_processes = chunk_processes  # Run chunks on local worker processes
+        self.incremental = incremental  # Reuse cached chunks whose inputs haven't changed
+        self.scratch_dir = scratch_dir  # Where job workspaces go, None for the system temp dir
+        self.hwaccel = hwaccel  # GPU decode and scaling: 'auto', 'off' or a HW_PATHS method
+        self.conform = conform  # How other shapes fit the output: 'fit', 'fill' or 'crop'
+        self.scaler = scaler  # swscale algorithm for resizing
+        self.single_pass = single_pass  # Conform and join every input in one ffmpeg, no temp clips
+
+class ProgressUpdate:
+    """A progress report for the whole conversion.
+
+    percent covers every phase, so pre-transcoding video inputs and the
+    final encode share one progress bar. frame/total_frames and the
+    encoder stats are only set while the final encode is running.
+    """
+
+    def __init__(self, phase, percent, frame=None, total_frames=None, detail="",
+                 fps=None, speed=None, total_size=None):
+        self.phase = phase  # 'transcode' or 'encode'
+        self.percent = percent
+        self.frame = frame
+        self.total_frames = total_frames
+        self.detail = detail
+        self.fps = fps  # Frames encoded per second
+        self.speed = speed  # Multiple of real time
+        self.total_size = total_size  # Bytes written so far
+
+# Audio bitrate in kbps used when encoding to a target size
+TARGET_AUDIO_BITRATE = 128
+
+# Room left for the MP4 index and headers: a fixed part plus a share of the size
+CONTAINER_OVERHEAD_BYTES = 16 * 1024
+CONTAINER_OVERHEAD_SHARE = 0.01
+
+# Lowest bitrate in kbps a target-size encode will go down to
+MIN_CORRECTED_BITRATE = 50
+
+# Free space wanted on top of the estimated size of intermediate files
+SCRATCH_MARGIN = 1.1
+SCRATCH_RESERVE_BYTES = 64 * 1024 * 1024
+
+# Re-encodes allowed when the output still comes out over the target size
+MAX_SIZE_RETRIES = 2
+
+# Open files a single pass encode needs per input, and for everything else
+SINGLE_PASS_FILES_PER_INPUT = 4
+SINGLE_PASS_FILES_RESERVE = 64
+
+# Decoded frames each input of a single pass encode can hold at once, and
+# the share of free memory all of them together may use
+SINGLE_PASS_FRAMES_PER_INPUT = 16
+SINGLE_PASS_MEMORY_SHARE = 0.5
+
+def plan_input_groups(costs, max_inputs, memory_budget=None):
+    """Split inputs into consecutive groups that each fit one ffmpeg.
+
+    costs is the memory in bytes each input needs. Every group has at most
+    max_inputs inputs and, where there's a memory_budget, costs adding up
+    to no more than it. Returns a list of index ranges.
+    """
+    groups = []
+    start = 0
+    used = 0
+    for i, cost in enumerate(costs):
+        full = i - start >= max_inputs or (
+            memory_budget is not None and used + cost > memory_budget
+        )
+        if full and i > start:
+            groups.append(range(start, i))
+            start, used = i, 0
+        used += cost
+    groups.append(range(start, len(costs)))
+    return groups
+
+def target_size_bytes(target_size, size_unit):
+    multiplier = 1024 * 1024 if size_unit == "MB" else 1024
+    return int(target_size * multiplier)
+
+def video_bit_budget(target_bytes, duration_seconds, audio_kbps=0):
+    """Bits left for the video stream once audio and container overhead are paid for"""
+    overhead = CONTAINER_OVERHEAD_BYTES + target_bytes * CONTAINER_OVERHEAD_SHARE
+    audio_bits = audio_kbps * 1000 * duration_seconds
+    return (target_bytes - overhead) * 8 - audio_bits
+
+def calculate_target_bitrate(target_size, size_unit, duration_seconds, audio_kbps=0):
+    """Calculate required bitrate in kbps for target file size"""
+    if not target_size or duration_seconds <= 0:
+        return None
+
+    video_bits = video_bit_budget(
+        target_size_bytes(target_size, size_unit), duration_seconds, audio_kbps
+    )
+
+    # Convert to kbps
+    target_kbps = int(video_bits / duration_seconds) // 1000
+
+    # Same floor as the over-target correction, so small targets are hit
+    # on the first encode instead of overshooting
+    return max(MIN_CORRECTED_BITRATE, target_kbps)
+
+def parse_resolution(resolution):
+    """(width, height) from a WIDTHxHEIGHT string, or None"""
+    try:
+        width, height = resolution.lower().split('x')
+        return int(width), int(height)
+    except (AttributeError, ValueError):
+        return None
+
+def frame_size(info):
+    """(width, height) from an input's metadata, or None if unknown"""
+    if info and info.get('width') and info.get('height'):
+        return info['width'], info['height']
+    return None
+
+def concat_escape(path):
+    """Quote a path for an ffmpeg concat list.
+
+    The demuxer resolves relative entries against the list's own
+    directory, which is the job workspace, so the path is made absolute.
+    """
+    return "'" + os.path.abspath(path).replace("'", "'\\''") + "'"
+
+def detect_image_sequence(files):
+    """Find a contiguous numbered sequence such as shot_0001.png..shot_0240.png.
+
+    Returns (printf-style pattern, start number) for the image2 demuxer, or
+    None if the files aren't one gap-free run in a single directory.
+    """
+    if not files:
+        return None
+    directory = os.path.dirname(files[0])
+    prefix = extension = None
+    numbers = []
+    digit_counts = []
+    for file in files:
+        if os.path.dirname(file) != directory:
+            return None
+        match = re.match(r"^(.*?)(\d+)(\.[^.]+)$", os.path.basename(file))
+        if not match:
+            return None
+        if prefix is None:
+            prefix, extension = match.group(1), match.group(3)
+        elif (match.group(1), match.group(3)) != (prefix, extension):
+            return None
+        numbers.append(int(match.group(2)))
+        digit_counts.append(len(match.group(2)))
+
+    start = numbers[0]
+    if numbers != list(range(start, start + len(numbers))):
+        return None
+
+    if len(set(digit_counts)) == 1:
+        width = digit_counts[0]
+        number_format = f"%0{width}d" if width > 1 else "%d"
+    elif all(len(str(n)) == w for n, w in zip(numbers, digit_counts)):
+        # Unpadded numbers that grow in length, e.g. 9, 10, 11
+        number_format = "%d"
+    else:
+        return None
+
+    # Literal % in the file name has to be doubled for image2
+    pattern = prefix.replace("%", "%%") + number_format + extension.replace("%", "%%")
+    return os.path.join(directory, pattern), start
+
+def copy_signature(info):
+    """Stream parameters that must be identical to join files with -c copy"""
+    fps = info.get('fps')
+    return (
+        info.get('codec'),
+        info.get('profile'),
+        info.get('level'),
+        info.get('extradata_hash'),
+        info.get('pix_fmt'),
+        round(fps, 3) if fps else None,
+        info.get('width'),
+        info.get('height'),
+        info.get('time_base'),
+        info.get('audio_codec'),
+        info.get('audio_sample_rate'),
+        info.get('audio_channels'),
+    )
+
+def encoder_args(encoder, bitrate, average=False):
+    """Codec and rate control arguments for the final encode.
+
+    With average set only the average bitrate is fixed, so the encoder can
+    move bits from easy sections to hard ones when aiming for a file size.
+    """
+    args = ["-c:v", encoder]
+    if encoder.endswith("_nvenc"):
+        args.extend(["-preset", "p7", "-tune", "hq"])
+        if average:
+            # NVENC's own two-pass mode within a single run
+            args.extend(["-rc", "vbr", "-multipass", "fullres"])
+        else:
+            args.extend(["-rc", "vbr_hq"])
+    args.extend(["-b:v", f"{bitrate}k"])
+    if not average:
+        args.extend([
+            "-maxrate", f"{bitrate}k",
+            "-bufsize", f"{bitrate*2}k"
+        ])
+    return args
+
+def pass_log_dir():
+    path = os.path.join(get_data_dir(), 'passlogs')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def prune_pass_logs(directory, keep=10):
+    """Delete all but the most recently used first-pass stats"""
+    markers = sorted(
+        (entry for entry in os.scandir(directory) if entry.name.endswith(".done")),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True
+    )
+    for marker in markers[keep:]:
+        prefix = marker.path[:-len(".done")]
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if path.startswith(prefix):
+                os.remove(path)
+
+def copy_pass_log(source, destination):
+    """Copy the stats files of one first pass to another prefix.
+
+    Each file is written under a temp name and renamed into place, so
+    other jobs reading destination never see half a file.
+    """
+    directory, name = os.path.split(source)
+    for entry in os.listdir(directory):
+        if not entry.startswith(name) or entry.endswith((".done", ".tmp")):
+            continue
+        target = destination + entry[len(name):]
+        shutil.copyfile(os.path.join(directory, entry), target + ".tmp")
+        os.replace(target + ".tmp", target)
+
+def output_format_args(encoder, resolution, settings):
+    """Software conform filter for the encoded video's size, rate and format.
+
+    VAAPI encoders only take frames on the GPU, so those get them uploaded
+    at the end.
+    """
+    upload = upload_filter(encoder)
+    graph = conform_filter(
+        parse_resolution(resolution), settings.fps, settings.conform, settings.scaler,
+        pix_fmt=None if upload else 'yuv420p'
+    )
+    return ["-vf", f"{graph},{upload}" if upload else graph]
+
+class ConversionEngine:
+    """Builds and runs the ffmpeg commands for one output video.
+
+    Has no GUI dependencies so it can be driven from the Tk app, the
+    command line or other scripts. Progress is reported through the
+    optional on_progress(ProgressUpdate) and on_status(text) callbacks,
+    which are called from worker threads. cancel(), pause() and resume()
+    can be called from any thread while run() is going. on_event(dict)
+    gets the instrumentation events described in events.py.
+    """
+
+    def __init__(self, media_files, file_types, settings, on_progress=None, on_status=None,
+                 on_event=None):
+        self.media_files = list(media_files)
+        self.file_types = list(file_types)
+        self.settings = settings
+        self.on_progress = on_progress
+        self.on_status = on_status
+        self.on_event = on_event
+        self.process = None  # FFmpegProcess of the final pass
+        self.metadata = [None] * len(self.media_files)
+        self.timeline = None  # Built from the probed metadata in run()
+        self.bitrate = settings.bitrate
+        self.encoder = None  # Picked in run(), shared by every ffmpeg pass
+        self.hw_method = None  # HW_PATHS method for decoding and scaling, None for software
+        # Running FFmpegProcess and ChunkRunner objects, for pause and cancel
+        self.processes = set()
+        self.process_lock = threading.Lock()
+        self.cancelled = threading.Event()
+        self.paused = False
+        self.writing = None  # Output path the final pass has started writing
+        # Share of the progress bar taken by pre-transcoding
+        self.transcode_weight = 0.5 if 'video' in self.file_types else 0.0
+        # Part of the encode phase the running pass covers, for two-pass encodes
+        self.encode_span = (0.0, 1.0)
+        self.pass_label = ""
+        # Inputs the running pass covers when it's only part of the output
+        self.encode_timeline = None
+        # Keeps temp files of concurrent jobs apart
+        self.temp_tag = uuid.uuid4().hex[:8]
+        self.workspace = None  # Private temp directory, only exists while running
+        # Wall seconds spent in each phase of run(), see enter_phase()
+        self.phase_times = {}
+        self.current_phase = None
+        self.phase_start = None
+        self.usage = UsageTotals()  # Resources used by every ffmpeg run so far
+        self.temp_bytes = None  # Size of the workspace just before it's removed
+        self.summary = None  # Set when run() returns or raises
+
+    def thread_args(self):
+        if self.settings.threads:
+            return ["-threads", str(self.settings.threads)]
+        return []
+
+    def status(self, text):
+        if self.on_status:
+            self.on_status(text)
+
+    def report(self, update):
+        if self.on_progress:
+            self.on_progress(update)
+
+    def enter_phase(self, name):
+        """Start timing phase name, ending the one before it. None just ends it.
+
+        Phases run one after another, so every second of run() is counted
+        once: probe, setup, transcode, list, encode and cleanup.
+        """
+        if name == self.current_phase:
+            return
+        now = time.perf_counter()
+        if self.current_phase:
+            seconds = now - self.phase_start
+            self.phase_times[self.current_phase] = (
+                self.phase_times.get(self.current_phase, 0.0) + seconds
+            )
+            self.emit('phase', phase=self.current_phase, seconds=seconds)
+        self.current_phase = name
+        self.phase_start = now
+
+    def emit(self, kind, **fields):
+        if self.on_event:
+            self.on_event(dict(event=kind, time=time.time(), **fields))
+
+    def record_process(self, label, stats):
+        """Add a finished ffmpeg's FFmpegProcess.stats() to the job's totals"""
+        self.usage.add(stats)
+        self.emit('process', label=label, **stats)
+
+    def track(self, process):
+        """Add a running process, catching up on a pause or cancel it missed"""
+        with self.process_lock:
+            self.processes.add(process)
+            if self.cancelled.is_set():
+                process.kill()
+            elif self.paused:
+                process.suspend()
+
+    def untrack(self, process):
+        with self.process_lock:
+            self.processes.discard(process)
+
+    def check_cancelled(self):
+        if self.cancelled.is_set():
+            raise ConversionCancelled("Conversion cancelled")
+
+    def cancel(self):
+        """Stop the conversion. Queued work is dropped and running ffmpegs killed"""
+        with self.process_lock:
+            self.cancelled.set()
+            self.paused = False
+            for process in self.processes:
+                process.kill()
+        self.status("Cancelling...")
+
+    def pause(self):
+        """Suspend every running ffmpeg until resume()"""
+        with self.process_lock:
+            if self.cancelled.is_set() or self.paused:
+                return
+            self.paused = True
+            for process in self.processes:
+                process.suspend()
+        self.status("Paused")
+
+    def resume(self):
+        with self.process_lock:
+            if not self.paused:
+                return
+            self.paused = False
+            for process in self.processes:
+                process.resume()
+        self.status("Resuming...")
+
+    def resolve_bitrate(self):
+        """Bitrate to encode at, in kbps, honouring the target size if set"""
+        settings = self.settings
+        target_bitrate = calculate_target_bitrate(
+            settings.target_size, settings.size_unit, self.timeline.duration,
+            self.audio_bitrate()
+        )
+        if target_bitrate is not None:
+            print(f"Calculated target bitrate: {target_bitrate} kbps for target size: "
+                  f"{settings.target_size} {settings.size_unit}")
+            return target_bitrate
+        return settings.bitrate
+
+    def has_audio(self):
+        return any(info and info.get('audio_codec')
+                   for info, file_type in zip(self.metadata, self.file_types)
+                   if file_type == 'video')
+
+    def audio_bitrate(self):
+        """Audio kbps the output will carry when encoding to a target size"""
+        return TARGET_AUDIO_BITRATE if self.has_audio() else 0
+
+    def select_encoder(self):
+        """Encoder for the whole job, checked against what ffmpeg can run"""
+        capabilities = get_capabilities()
+        if self.settings.encoder:
+            problem = capabilities.check(self.settings.encoder)
+            if problem:
+                raise ConversionError(problem)
+            return self.settings.encoder
+        return capabilities.choose('h264', self.settings.use_gpu)
+
+    def probe_inputs(self):
+        self.status("Analyzing input files...")
+        self.metadata, probe_time = probe_files(self.media_files, self.file_types)
+        print(f"Probed {len(self.metadata)} files in {probe_time:.2f}s")
+        self.timeline = Timeline(self.file_types, self.metadata, self.settings.fps)
+
+    def detect_resolution(self):
+        """Size of the largest input rounded to even numbers, or None if unknown.
+
+        The largest input's own shape is kept so it isn't stretched; inputs
+        of other shapes are fitted to it by the conform filter.
+        """
+        sizes = [frame_size(info) for info in self.metadata if frame_size(info)]
+        if not sizes:
+            return None
+        width, height = even_size(max(sizes, key=lambda size: size[0] * size[1]))
+        return f"{width}x{height}"
+
+    def transcode_pool_size(self, clip_count):
+        """Number of clips transcoded at once, and -threads for each of them"""
+        budget = self.settings.threads or os.cpu_count() or 1
+        workers = self.settings.transcode_workers or max(1, min(4, budget // 2))
+        workers = max(1, min(workers, clip_count))
+        return workers, max(1, budget // workers)
+
+    def global_args(self, encoder, hardware=True):
+        """Device options before the first input"""
+        if hardware and self.hw_method:
+            return hw_device_args(self.hw_method)
+        return device_args(encoder)
+
+    def format_args(self, encoder, resolution, hardware=True, on_device=False, sources=None):
+        """Conform filter for the output, scaling on the GPU when there's a hw_method.
+
+        GPU scalers can only stretch, so they're used for fill and for
+        sources (metadata dicts) that already have the output's shape;
+        anything else is conformed in software. on_device says the decoder
+        already left the frames in GPU memory.
+        """
+        settings = self.settings
+        if not (hardware and self.hw_method):
+            return output_format_args(encoder, resolution, settings)
+        size = even_size(parse_resolution(resolution))
+        if settings.conform == 'fill' or sources and all(
+            stretch_matches(frame_size(info), size, settings.conform) for info in sources
+        ):
+            scale = hw_scale_filter(
+                self.hw_method, size, on_device, download=not is_hardware(encoder)
+            )
+            graph = ",".join(f for f in (f"fps={settings.fps:g}", scale, "setsar=1") if f)
+            return ["-vf", graph]
+        args = output_format_args(encoder, resolution, settings)
+        if on_device:
+            args[1] = "hwdownload,format=nv12," + args[1]
+        return args
+
+    def build_transcode_command(self, file, output, resolution, threads=None,
+                                hardware=True, source=None):
+        """Transcode one video input.
+
+        hardware=False forces software decoding and scaling. source is the
+        input's own metadata.
+        """
+        settings = self.settings
+        encoder = self.encoder or self.select_encoder()
+        hardware = hardware and self.hw_method is not None
+        # Transcode video to ensure compatibility
+        transcode_cmd = [get_ffmpeg_path(), "-y"] + self.global_args(encoder, hardware)
+        if hardware:
+            transcode_cmd.extend(hw_decode_args(self.hw_method))
+        transcode_cmd.extend([
+            "-i", file,
+            "-c:v", encoder,
+            "-r", f"{settings.fps:g}",
+        ])
+
+        # Conform to the output size, frame rate and pixel format
+        transcode_cmd.extend(self.format_args(
+            encoder, resolution, hardware, on_device=True, sources=[source]
+        ))
+
+        if threads:
+            transcode_cmd.extend(["-threads", str(threads)])
+        transcode_cmd.append(output)
+        return transcode_cmd
+
+    def transcode_clip(self, file, output, resolution, threads, duration,
+                       on_clip_progress, failed, source=None):
+        """Transcode one clip, reporting seconds done through on_clip_progress.
+
+        If decoding or scaling on the GPU fails the clip is done again in
+        software.
+        """
+        if failed.is_set() or self.cancelled.is_set():
+            return
+
+        def on_ffmpeg_progress(event):
+            if duration and event.out_time is not None:
+                on_clip_progress(min(event.out_time, duration))
+
+        hardware = self.hw_method is not None
+        while True:
+            cmd = self.build_transcode_command(
+                file, output, resolution, threads, hardware, source
+            )
+            process = FFmpegProcess(cmd, on_progress=on_ffmpeg_progress)
+            self.track(process)
+            try:
+                returncode = process.wait()
+            finally:
+                self.untrack(process)
+            self.record_process(f"transcode {os.path.basename(file)}", process.stats())
+            self.check_cancelled()
+            if returncode == 0 or not hardware or failed.is_set():
+                break
+            print(f"{self.hw_method} decoding failed for {os.path.basename(file)}, "
+                  f"transcoding it in software: {process.error_output(3)}")
+            hardware = False
+        if returncode != 0 and not failed.is_set():
+            raise ConversionError(
+                f"FFmpeg error during transcoding {os.path.basename(file)}: "
+                f"{process.error_output()}"
+            )
+        on_clip_progress(duration or 1.0)
+
+    def stop_transcodes(self):
+        with self.process_lock:
+            for process in self.processes:
+                process.kill()
+
+    def check_space(self, needed_bytes, what, directory=None):
+        """Raise ConversionError if directory can't hold needed_bytes of what"""
+        directory = directory or self.workspace.directory
+        needed = int(needed_bytes * SCRATCH_MARGIN) + SCRATCH_RESERVE_BYTES
+        try:
+            free = shutil.disk_usage(directory).free
+        except OSError:
+            return
+        if free < needed:
+            raise ConversionError(
+                f"Not enough free space in {directory} for {what}: needs about "
+                f"{needed / 1024 ** 2:.0f} MB, {free / 1024 ** 2:.0f} MB free"
+            )
+
+    def estimated_bytes(self, indices, kbps=None):
+        """Rough size of the inputs in indices encoded at kbps (or their own bitrate)"""
+        total = 0
+        for i in indices:
+            info = self.metadata[i] or {}
+            rate = max(kbps or 0, info.get('bitrate') or 0) or self.bitrate
+            total += rate * 1000 / 8 * self.timeline.durations[i]
+        return total
+
+    def transcode_videos(self, resolution):
+        """Create temporary videos for any inputs that need transcoding.
+
+        Clips are transcoded on a bounded pool. If one fails the queued clips are
+        dropped and the running ones killed.
+        """
+        temp_video_map = {}
+        clips = []
+        for i, (file, file_type) in enumerate(zip(self.media_files, self.file_types)):
+            if file_type != 'video':
+                continue
+            temp_output = self.workspace.path(f"video_{i}.mp4")
+            temp_video_map[i] = temp_output
+            known = self.timeline.known[i]
+            clips.append((file, temp_output, self.timeline.durations[i] if known else None,
+                          self.metadata[i]))
+
+        if not clips:
+            return temp_video_map
+        self.enter_phase('transcode')
+        self.check_space(
+            self.estimated_bytes(list(temp_video_map), self.bitrate), "transcoded clips"
+        )
+
+        # Clips of unknown length count as one unit of work each
+        clip_totals = [duration or 1.0 for _, _, duration, _ in clips]
+        clip_done = [0.0] * len(clips)
+        total_work = sum(clip_totals)
+        progress_lock = threading.Lock()
+        finished = [0]
+
+        def make_progress_callback(index):
+            def on_clip_progress(done):
+                with progress_lock:
+                    if done >= clip_totals[index] and clip_done[index] < clip_totals[index]:
+                        finished[0] += 1
+                    clip_done[index] = done
+                    fraction = sum(clip_done) / total_work
+                    count = finished[0]
+                self.report(ProgressUpdate(
+                    'transcode',
+                    fraction * self.transcode_weight * 100,
+                    detail=f"Transcoding clips ({count}/{len(clips)} done)"
+                ))
+            return on_clip_progress
+
+        workers, threads = self.transcode_pool_size(len(clips))
+        self.status(f"Transcoding {len(clips)} clips, {workers} at a time...")
+        failed = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = [
+                executor.submit(
+                    self.transcode_clip, file, output, resolution, threads,
+                    duration, make_progress_callback(index), failed, source
+                )
+                for index, (file, output, duration, source) in enumerate(clips)
+            ]
+            done, _ = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in done:
+                if future.exception() is not None:
+                    failed.set()
+                    raise future.exception()
+            # Clips skipped after a cancel return without an error
+            self.check_cancelled()
+        except BaseException:
+            failed.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.stop_transcodes()
+            raise
+        finally:
+            executor.shutdown(wait=True)
+        return temp_video_map
+
+    def write_file_list(self, list_path, temp_video_map, indices=None):
+        self.enter_phase('list')
+        if indices is None:
+            indices = range(len(self.media_files))
+        with open(list_path, "w", encoding='utf-8') as f:
+            for i in indices:
+                file, file_type = self.media_files[i], self.file_types[i]
+                if file_type == 'image':
+                    # For images, specify duration
+                    f.write(f"file {concat_escape(file)}\n")
+                    f.write(f"duration {1/self.settings.fps}\n")
+                else:
+                    # For videos, use the transcoded temporary file
+                    f.write(f"file {concat_escape(temp_video_map[i])}\n")
+
+    def concat_input_args(self, list_path):
+        args = ["-f", "concat", "-safe", "0", "-i", list_path]
+        if 'video' not in self.file_types:
+            # Image timestamps otherwise snap to the image demuxer's 1/25s
+            # ticks, which duplicates frames at other rates
+            args = ["-r", f"{self.settings.fps:g}"] + args
+        return args
+
+    def sequence_input_args(self, sequence):
+        """Read a numbered image sequence directly, with exact frame timing"""
+        pattern, start_number = sequence
+        return [
+            "-f", "image2",
+            "-framerate", f"{self.settings.fps:g}",
+            "-start_number", str(start_number),
+            "-i", pattern,
+        ]
+
+    def build_encode_command(self, input_args, output_path, resolution, encoder, bitrate,
+                             frame_count=None, pass_number=None, pass_log=None,
+                             threads=None, extra_args=None, hardware=True):
+        hardware = hardware and self.hw_method is not None
+        # Video only timelines can be decoded on the GPU, images get uploaded
+        on_device = hardware and 'image' not in self.file_types
+        cmd = [get_ffmpeg_path(), "-y"] + self.global_args(encoder, hardware)
+        if on_device:
+            cmd.extend(hw_decode_args(self.hw_method))
+        cmd.extend(input_args)
+
+        # Constant frame rate for every muxer, so a first pass into the null
+        # muxer sees the same frames as the real one
+        cmd.extend(["-r", f"{self.settings.fps:g}"])
+
+        # Stop at the end of the selection even if later numbers exist on disk
+        if frame_count:
+            cmd.extend(["-frames:v", str(frame_count)])
+
+        target_size = bool(self.settings.target_size)
+        cmd.extend(encoder_args(encoder, bitrate, average=target_size))
+        if pass_number:
+            cmd.extend(["-pass", str(pass_number), "-passlogfile", pass_log])
+        if pass_number == 1:
+            # Only the stats are wanted from the first pass
+            cmd.extend(["-an", "-f", "null"])
+        elif target_size and self.has_audio():
+            # Fixed audio bitrate so it can be budgeted for
+            cmd.extend(["-c:a", "aac", "-b:a", f"{TARGET_AUDIO_BITRATE}k"])
+        if extra_args:
+            cmd.extend(extra_args)
+        cmd.extend(["-threads", str(threads)] if threads else self.thread_args())
+        if "-filter_complex" not in input_args:
+            # A single pass graph has already conformed its output
+            cmd.extend(self.format_args(encoder, resolution, hardware, on_device, self.metadata))
+        cmd.append(output_path)
+        return cmd
+
+    def pass_log_prefix(self, input_args, resolution, encoder, frame_count):
+        """Where first-pass stats for this exact encode are kept, or None.
+
+        The key covers the inputs and everything that changes the frames
+        the encoder sees, but not the bitrate, so changing only the target
+        size reuses the stats from last time.
+        """
+        files = []
+        for file in self.media_files:
+            try:
+                st = os.stat(file)
+                files.append([os.path.abspath(file), st.st_size, st.st_mtime_ns])
+            except OSError:
+                return None
+        key = json.dumps([
+            files, input_args[1], resolution, self.settings.fps, encoder, frame_count,
+            self.settings.conform, self.settings.scaler
+        ])
+        try:
+            directory = pass_log_dir()
+        except OSError as e:
+            print(f"First pass stats can't be kept: {e}")
+            return None
+        return os.path.join(directory, hashlib.sha1(key.encode('utf-8')).hexdigest()[:16])
+
+    def corrected_bitrate(self, bitrate, output_bytes, target_bytes):
+        """Scale bitrate down by how far the video stream overshot its budget"""
+        duration = self.timeline.duration
+        audio_kbps = self.audio_bitrate()
+        budget = video_bit_budget(target_bytes, duration, audio_kbps)
+        used = video_bit_budget(output_bytes, duration, audio_kbps)
+        if budget <= 0 or used <= 0:
+            # Audio and overhead alone don't fit, a lower bitrate won't help
+            return bitrate
+        # Aim a little lower, rate control rarely lands exactly on target
+        return max(MIN_CORRECTED_BITRATE, int(bitrate * budget / used * 0.97))
+
+    def encode(self, input_args, output_path, resolution, encoder, frame_count=None,
+               feeder=None):
+        """Run the final encode, falling back to software if the GPU path fails"""
+        try:
+            self.encode_passes(input_args, output_path, resolution, encoder, frame_count, feeder)
+        except ConversionCancelled:
+            raise
+        except ConversionError:
+            if not self.hw_method:
+                raise
+            # run_encode has already printed ffmpeg's error
+            print(f"{self.hw_method} decoding or scaling failed, encoding again in software")
+            self.hw_method = None
+            self.encode_span = (0.0, 1.0)
+            self.pass_label = ""
+            self.encode_passes(input_args, output_path, resolution, encoder, frame_count, feeder)
+
+    def encode_passes(self, input_args, output_path, resolution, encoder, frame_count=None,
+                      feeder=None):
+        """Run the passes of the final encode.
+
+        With a target size this is a two-pass encode where the encoder
+        supports it, and the output size is checked afterwards. If it came
+        out too big it's encoded again at a corrected bitrate.
+        """
+        settings = self.settings
+        if not settings.target_size:
+            cmd = self.build_encode_command(
+                input_args, output_path, resolution, encoder, self.bitrate, frame_count
+            )
+            self.run_encode(cmd, feeder)
+            return
+
+        pass_log = None
+        cached_log = None
+        if encoder in TWO_PASS_ENCODERS:
+            cached_log = self.pass_log_prefix(input_args, resolution, encoder, frame_count)
+            # ffmpeg only ever sees the job's own copy, so jobs sharing a key
+            # can't write the same stats files at once
+            pass_log = self.workspace.path("passlog")
+        reused = False
+        if cached_log and os.path.exists(cached_log + ".done"):
+            try:
+                copy_pass_log(cached_log, pass_log)
+                os.utime(cached_log + ".done")
+                print("Reusing first pass stats from an earlier encode")
+                reused = True
+            except OSError as e:
+                # Pruned by another job in the meantime
+                print(f"Could not reuse first pass stats: {e}")
+        if pass_log and not reused:
+            self.encode_span = (0.0, 0.4)
+            self.pass_label = "Pass 1/2: "
+            cmd = self.build_encode_command(
+                input_args, "-", resolution, encoder, self.bitrate, frame_count,
+                pass_number=1, pass_log=pass_log
+            )
+            self.run_encode(cmd, feeder)
+            if cached_log:
+                try:
+                    copy_pass_log(pass_log, cached_log)
+                    open(cached_log + ".done", "w").close()
+                    prune_pass_logs(os.path.dirname(cached_log))
+                except OSError as e:
+                    print(f"Could not keep first pass stats: {e}")
+            self.encode_span = (0.4, 1.0)
+            self.pass_label = "Pass 2/2: "
+
+        target_bytes = target_size_bytes(settings.target_size, settings.size_unit)
+        bitrate = self.bitrate
+        for attempt in range(MAX_SIZE_RETRIES + 1):
+            cmd = self.build_encode_command(
+                input_args, output_path, resolution, encoder, bitrate, frame_count,
+                pass_number=2 if pass_log else None, pass_log=pass_log
+            )
+            try:
+                self.run_encode(cmd, feeder)
+            except ConversionError:
+                if reused and not self.cancelled.is_set():
+                    # Don't hand the same stats to the retry or the next run
+                    try:
+                        os.remove(cached_log + ".done")
+                    except OSError:
+                        pass
+                raise
+            output_bytes = os.path.getsize(output_path)
+            if output_bytes <= target_bytes:
+                print(f"Output is {output_bytes} bytes, target was {target_bytes} bytes")
+                return
+
+            corrected = self.corrected_bitrate(bitrate, output_bytes, target_bytes)
+            if attempt == MAX_SIZE_RETRIES or corrected >= bitrate:
+                break
+            print(f"Output is {output_bytes} bytes, over the {target_bytes} byte target. "
+                  f"Encoding again at {corrected} kbps")
+            self.status("Output too big, encoding again at a lower bitrate...")
+            self.pass_label = "Resizing: "
+            bitrate = self.bitrate = corrected
+
+        print(f"Warning: output is {output_bytes} bytes, "
+              f"could not get it under the {target_bytes} byte target")
+        self.status("Could not reach the target size")
+
+    def run_chunked(self, output_path, resolution, encoder, sequence, list_path):
+        """Encode an image timeline as GOP aligned chunks in parallel, then join them.
+
+        In incremental mode chunks go through the segment cache, so only
+        chunks whose inputs or settings changed since the last run are
+        encoded. Returns False without doing anything if the timeline is
+        too short to split and there's no cache to use. Chunks are always
+        scaled in software, many GPU sessions at once would just queue up.
+        """
+        settings = self.settings
+        budget = settings.threads or os.cpu_count() or 1
+        workers = settings.chunk_workers or budget
+        gop = gop_size(settings.fps)
+        cache = get_segment_cache() if settings.incremental else None
+        chunk_frames = settings.chunk_frames
+        if cache and not chunk_frames:
+            chunk_frames = gop * INCREMENTAL_CHUNK_GOPS
+        chunks = plan_chunks(len(self.media_files), gop, workers, chunk_frames)
+        if len(chunks) < 2 and not cache:
+            return False
+        workers = min(workers, len(chunks))
+        threads = max(1, budget // workers)
+
+        self.enter_phase('list')
+        commands = []
+        chunk_paths = []
+        chunk_done = [0] * len(chunks)
+        segment_keys = {}  # Chunk index -> (partial path, cache key) for new segments
+        for index, (start, count) in enumerate(chunks):
+            key = None
+            if cache:
+                # Thread count doesn't change what's in a segment, leave it out
+                encode_args = self.build_encode_command(
+                    [], "", resolution, encoder, self.bitrate,
+                    frame_count=count, threads=1, extra_args=gop_args(gop), hardware=False
+                )[1:]
+                key = cache.key(self.media_files[start:start + count], encode_args)
+                cached = cache.get(key) if key else None
+                if cached:
+                    chunk_paths.append(cached)
+                    chunk_done[index] = count
+                    continue
+
+            if sequence:
+                pattern, first = sequence
+                input_args = self.sequence_input_args((pattern, first + start))
+            else:
+                chunk_list = self.workspace.path(f"chunk_list_{index}.txt")
+                self.write_file_list(chunk_list, {}, range(start, start + count))
+                input_args = self.concat_input_args(chunk_list)
+            if key:
+                chunk_path = cache.path(key)
+                partial_path = cache.partial_path(key, self.temp_tag)
+                segment_keys[index] = (partial_path, key)
+            else:
+                chunk_path = partial_path = self.workspace.path(f"chunk_{index}.mp4")
+            chunk_paths.append(chunk_path)
+            commands.append((index, self.build_encode_command(
+                input_args, partial_path, resolution, encoder, self.bitrate,
+                frame_count=count, threads=threads, extra_args=gop_args(gop),
+                hardware=False
+            )))
+
+        if cache:
+            print(f"Reusing {len(chunks) - len(commands)} of {len(chunks)} cached chunks")
+
+        def on_chunk_finished(index):
+            if index in segment_keys:
+                try:
+                    cache.commit(*segment_keys[index])
+                except OSError as e:
+                    print(f"Could not cache chunk {index + 1}: {e}")
+
+        # Joining is quick, chunk encoding gets most of the progress bar
+        chunk_share = 0.95
+        total_frames = len(self.media_files)
+        progress_lock = threading.Lock()
+
+        def on_chunk_progress(index, frame):
+            with progress_lock:
+                chunk_done[index] = min(frame, chunks[index][1])
+                done = sum(chunk_done)
+                finished = sum(1 for i, d in enumerate(chunk_done) if d >= chunks[i][1])
+            self.report(ProgressUpdate(
+                'encode',
+                done / total_frames * chunk_share * 100,
+                frame=done,
+                total_frames=total_frames,
+                detail=f"Encoding chunks ({finished}/{len(chunks)} done)"
+            ))
+
+        if commands:
+            new_bytes = self.estimated_bytes(
+                [i for index, _ in commands
+                 for i in range(chunks[index][0], chunks[index][0] + chunks[index][1])],
+                self.bitrate
+            )
+            self.check_space(new_bytes, "encoded chunks", cache.directory if cache else None)
+            where = "worker processes" if settings.chunk_processes else "ffmpeg processes"
+            print(f"Encoding {len(commands)} chunks of up to {chunks[0][1]} frames "
+                  f"on {workers} {where}")
+            self.status(f"Encoding {len(commands)} chunks, {workers} at a time...")
+            self.enter_phase('encode')
+            runner = ChunkRunner(
+                commands, workers, on_progress=on_chunk_progress,
+                on_finished=on_chunk_finished, use_workers=settings.chunk_processes,
+                on_stats=lambda index, stats: self.record_process(f"chunk {index + 1}", stats)
+            )
+            self.track(runner)
+            try:
+                failure = runner.run()
+            finally:
+                self.untrack(runner)
+                # Segments that never made it into the cache
+                for partial_path, _ in segment_keys.values():
+                    if os.path.exists(partial_path):
+                        os.remove(partial_path)
+            self.check_cancelled()
+            if failure:
+                index, error = failure
+                raise ConversionError(f"FFmpeg error in chunk {index + 1}: {error}")
+
+        self.encode_span = (chunk_share, 1.0)
+        self.pass_label = "Joining chunks: "
+        self.join_parts(chunk_paths, list_path, output_path)
+        if cache:
+            cache.prune()
+        return True
+
+    def join_parts(self, paths, list_path, output_path):
+        """Join videos encoded with the same settings into output_path with a stream copy"""
+        with open(list_path, "w", encoding='utf-8') as f:
+            for path in paths:
+                f.write(f"file {concat_escape(path)}\n")
+        self.run_encode([
+            get_ffmpeg_path(),
+            "-y",
+            "-f", "concat",
+            "-safe", "0",
+            "-i", list_path,
+            "-c", "copy",
+            "-movflags", "+faststart",
+            output_path
+        ])
+
+    def single_pass_segments(self):
+        """The inputs of a single pass encode as (file type, timeline indices).
+
+        Every video is an input of its own. Consecutive images share one,
+        split where the image format changes since a concat list can't
+        switch decoders part way through.
+        """
+        segments = []
+        codecs = []
+        for i, file_type in enumerate(self.file_types):
+            codec = (self.metadata[i] or {}).get('codec')
+            if (file_type == 'image' and segments and segments[-1][0] == 'image'
+                    and codecs[-1] == codec):
+                segments[-1][1].append(i)
+            else:
+                segments.append((file_type, [i]))
+                codecs.append(codec)
+        return segments
+
+    def single_pass_groups(self, segments, size):
+        """Split segments into groups that one ffmpeg can open at once.
+
+        Each input costs a few open files and a queue of decoded frames at
+        the larger of its own and the output size.
+        """
+        limit = open_file_limit()
+        max_inputs = len(segments)
+        if limit:
+            max_inputs = max(
+                1, (limit - SINGLE_PASS_FILES_RESERVE) // SINGLE_PASS_FILES_PER_INPUT
+            )
+        costs = []
+        for _, indices in segments:
+            pixels = size[0] * size[1]
+            for i in indices:
+                source = frame_size(self.metadata[i])
+                if source:
+                    pixels = max(pixels, source[0] * source[1])
+            # Up to three bytes a pixel covers rgb24 and 10-bit yuv
+            costs.append(pixels * 3 * SINGLE_PASS_FRAMES_PER_INPUT)
+        memory = available_memory()
+        budget = memory * SINGLE_PASS_MEMORY_SHARE if memory else None
+        return plan_input_groups(costs, max_inputs, budget)
+
+    def single_pass_inputs(self, segments, resolution, encoder, tag):
+        """Input arguments and filter graph that conform and join segments.
+
+        Each segment is conformed on its own and the concat filter joins
+        them. When the timeline has audio, segments without any get
+        silence of the same length so the streams stay in step.
+        """
+        settings = self.settings
+        audio = self.has_audio()
+        conform = conform_filter(
+            parse_resolution(resolution), settings.fps, settings.conform, settings.scaler
+        )
+        args = []
+        graph = []
+        pads = []
+        for k, (file_type, indices) in enumerate(segments):
+            files = [self.media_files[i] for i in indices]
+            chain = conform
+            sequence = detect_image_sequence(files) if len(files) > 1 else None
+            if file_type == 'video':
+                args.extend(["-i", files[0]])
+            elif sequence:
+                args.extend(self.sequence_input_args(sequence))
+                # Stop at the end of the selection even if later numbers exist on disk
+                chain = f"trim=end_frame={len(files)},{conform}"
+            else:
+                segment_list = self.workspace.path(f"segment_list_{tag}_{k}.txt")
+                self.write_file_list(segment_list, {}, indices)
+                # Image timestamps otherwise snap to the image demuxer's 1/25s ticks
+                args.extend(["-r", f"{settings.fps:g}", "-f", "concat", "-safe", "0",
+                             "-i", segment_list])
+            graph.append(f"[{k}:v]{chain}[v{k}]")
+            pads.append(f"[v{k}]")
+            if not audio:
+                continue
+            if file_type == 'video' and (self.metadata[indices[0]] or {}).get('audio_codec'):
+                graph.append(f"[{k}:a:0]aformat=sample_fmts=fltp:sample_rates=48000"
+                             f":channel_layouts=stereo[a{k}]")
+            else:
+                duration = sum(self.timeline.durations[i] for i in indices)
+                graph.append(f"anullsrc=r=48000:cl=stereo,atrim=duration={duration:.6f}[a{k}]")
+            pads.append(f"[a{k}]")
+
+        upload = upload_filter(encoder)
+        joined = "[joined]" if upload else "[v]"
+        graph.append("".join(pads) + f"concat=n={len(segments)}:v=1:a={int(audio)}{joined}"
+                     + ("[a]" if audio else ""))
+        if upload:
+            graph.append(f"{joined}{upload}[v]")
+        args.extend(["-filter_complex", ";".join(graph), "-map", "[v]"])
+        if audio:
+            args.extend(["-map", "[a]"])
+        return args
+
+    def run_single_pass(self, output_path, resolution, encoder, list_path):
+        """Conform and join every input in one ffmpeg through a concat filter graph.
+
+        Nothing but the output is written, unless there are more inputs
+        than one ffmpeg can keep open. Then consecutive groups of them are
+        encoded into the workspace and joined with a stream copy, in one
+        pass each even with a target size. Returns False if the output
+        size isn't known, the concat filter needs every segment the same.
+        """
+        size = even_size(parse_resolution(resolution))
+        if size is None:
+            return False
+        # The conform filters in the graph run on the CPU
+        self.hw_method = None
+        # Nothing is transcoded ahead of the encode
+        self.transcode_weight = 0.0
+        segments = self.single_pass_segments()
+        groups = self.single_pass_groups(segments, size)
+        if len(groups) == 1:
+            print(f"Joining {len(segments)} inputs in a single pass")
+            self.encode(
+                self.single_pass_inputs(segments, resolution, encoder, 0), output_path,
+                resolution, encoder
+            )
+            return True
+
+        print(f"Too many inputs for one ffmpeg, encoding {len(segments)} inputs "
+              f"in {len(groups)} groups")
+        self.check_space(
+            self.estimated_bytes(range(len(self.media_files)), self.bitrate), "encoded groups"
+        )
+        # Joining is quick, the groups get most of the progress bar
+        group_share = 0.95
+        part_paths = []
+        done = 0.0
+        for k, group in enumerate(groups):
+            group_segments = [segments[j] for j in group]
+            indices = [i for _, segment in group_segments for i in segment]
+            self.encode_timeline = Timeline(
+                [self.file_types[i] for i in indices], [self.metadata[i] for i in indices],
+                self.settings.fps
+            )
+            share = self.encode_timeline.duration / self.timeline.duration
+            self.encode_span = (done * group_share, min(1.0, done + share) * group_share)
+            done += share
+            self.pass_label = f"Group {k + 1}/{len(groups)}: "
+            part_path = self.workspace.path(f"group_{k}.mp4")
+            self.run_encode(self.build_encode_command(
+                self.single_pass_inputs(group_segments, resolution, encoder, k), part_path,
+                resolution, encoder, self.bitrate
+            ))
+            part_paths.append(part_path)
+        self.encode_timeline = None
+        self.encode_span = (group_share, 1.0)
+        self.pass_label = "Joining groups: "
+        self.join_parts(part_paths, list_path, output_path)
+        return True
+
+    def plan_stream_copy(self, resolution, encoder):
+        """Check whether the video inputs can be joined without re-encoding.
+
+        Returns the first input's metadata when every input already matches
+        the output codec, pix_fmt, fps and size and they all share the exact
+        same stream parameters, parameter sets included. Otherwise returns
+        None and the timeline is encoded normally, since a separately
+        encoded clip almost never reproduces another encoder run's SPS/PPS.
+        """
+        settings = self.settings
+        size = even_size(parse_resolution(resolution))
+        if (not settings.stream_copy or settings.target_size or size is None
+                or 'image' in self.file_types or None in self.metadata):
+            return None
+
+        def matches_output(info):
+            return (
+                info.get('codec') == encoder_codec(encoder)
+                and info.get('pix_fmt') == 'yuv420p'
+                and info.get('fps') and abs(info['fps'] - settings.fps) < 0.01
+                and (info.get('width'), info.get('height')) == size
+            )
+
+        reference = self.metadata[0]
+        if not all(matches_output(info) for info in self.metadata):
+            return None
+        if any(copy_signature(info) != copy_signature(reference) for info in self.metadata):
+            return None
+        return reference
+
+    def run_stream_copy(self, reference, output_path, list_path):
+        """Join the inputs with a stream copy"""
+        print(f"Stream copying all {len(self.media_files)} clips")
+        self.transcode_weight = 0.0
+
+        self.enter_phase('list')
+        with open(list_path, "w", encoding='utf-8') as f:
+            for file in self.media_files:
+                f.write(f"file {concat_escape(file)}\n")
+
+        cmd = [
+            get_ffmpeg_path(),
+            "-y",
+            "-f", "concat",
+            "-safe", "0",
+            "-i", list_path,
+            "-map", "0:v:0",
+        ]
+        if reference.get('audio_codec'):
+            cmd.extend(["-map", "0:a:0"])
+        cmd.extend([
+            "-c", "copy",
+            "-movflags", "+faststart",
+            output_path
+        ])
+        self.run_encode(cmd)
+
+    def encode_progress(self, event):
+        """Turn an ffmpeg progress block from the final pass into a ProgressUpdate"""
+        frame = event.frame or 0
+        timeline = self.encode_timeline or self.timeline
+        total_frames = timeline.total_frames
+        fraction = 1.0 if event.done else timeline.fraction(event.out_time, frame)
+        start, end = self.encode_span
+        fraction = start + fraction * (end - start)
+        return ProgressUpdate(
+            'encode',
+            (self.transcode_weight + fraction * (1 - self.transcode_weight)) * 100,
+            frame=frame,
+            total_frames=total_frames,
+            detail=f"{self.pass_label}Processing frame {frame}/{total_frames}",
+            fps=event.fps,
+            speed=event.speed,
+            total_size=event.total_size
+        )
+
+    def run_encode(self, cmd, feeder=None):
+        """Run the final ffmpeg pass, reporting progress as it goes.
+
+        feeder, if given, is called on its own thread with ffmpeg's stdin
+        and is expected to write the input and close it.
+        """
+        self.check_cancelled()
+        self.enter_phase('encode')
+        # Print final command for debugging
+        print("FFmpeg command:", " ".join(cmd))
+
+        self.status("Encoding...")
+        self.process = FFmpegProcess(
+            cmd,
+            on_progress=lambda event: self.report(self.encode_progress(event)),
+            stdin=subprocess.PIPE if feeder else None
+        )
+        if cmd[-1] != "-":
+            self.writing = cmd[-1]
+        self.track(self.process)
+
+        feeder_errors = []
+        feeder_thread = None
+        if feeder:
+            def feed():
+                try:
+                    feeder(self.process.stdin)
+                except Exception as e:
+                    feeder_errors.append(e)
+                    # ffmpeg would otherwise wait forever for more input
+                    self.process.kill()
+            feeder_thread = threading.Thread(target=feed, daemon=True)
+            feeder_thread.start()
+
+        try:
+            returncode = self.process.wait()
+            if feeder_thread:
+                feeder_thread.join()
+        finally:
+            self.untrack(self.process)
+        self.record_process(self.pass_label.rstrip(": ") or "encode", self.process.stats())
+        self.check_cancelled()
+
+        if feeder_errors and not isinstance(feeder_errors[0], BrokenPipeError):
+            raise ConversionError(str(feeder_errors[0]))
+        if returncode != 0:
+            error_output = self.process.error_output()
+            print(f"FFmpeg error output: {error_output}")
+            raise ConversionError(f"FFmpeg error: {error_output}")
+
+    def run_pipeline(self, output_path, resolution, encoder):
+        """Encode images decoded by the worker pool from a rawvideo pipe"""
+        if not pillow_available():
+            raise ConversionError("Pipeline mode needs Pillow (pip install Pillow)")
+        size = even_size(parse_resolution(resolution))
+        if size is None:
+            raise ConversionError("Could not work out the output resolution")
+        pipeline = FramePipeline(
+            self.media_files, size[0], size[1],
+            workers=self.settings.decode_workers or self.settings.threads,
+            mode=self.settings.conform,
+            scaler=self.settings.scaler
+        )
+        try:
+            # The frames already have the output size, but it still goes in
+            # the first pass stats key
+            self.encode(
+                pipeline.input_args(self.settings.fps), output_path,
+                f"{size[0]}x{size[1]}", encoder,
+                feeder=lambda pipe: pipeline.feed(pipe, self.cancelled)
+            )
+        finally:
+            pipeline.close()
+
+    def run(self, output_path):
+        """Convert the media list into output_path, raising ConversionError on failure.
+
+        Afterwards summary holds the job's status, timings and resource use.
+        """
+        start = time.perf_counter()
+        error = None
+        try:
+            self.convert(output_path)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.finish(output_path, time.perf_counter() - start, error)
+
+    def finish(self, output_path, wall, error):
+        """Build the end of job summary, emit it and print it"""
+        if error is None:
+            status = 'done'
+        elif isinstance(error, ConversionCancelled):
+            status = 'cancelled'
+        else:
+            status = 'failed'
+        duration = self.timeline.duration if self.timeline else None
+        summary = {
+            'status': status,
+            'error': str(error) if error else None,
+            'wall': wall,
+            'duration': duration,
+            # Only a finished job covered the whole timeline
+            'speed': duration / wall if status == 'done' and duration and wall > 0 else None,
+            'phases': dict(self.phase_times),
+            'temp_bytes': self.temp_bytes,
+            'output_bytes': os.path.getsize(output_path) if status == 'done' else None,
+        }
+        summary.update(self.usage.to_dict())
+        self.summary = summary
+        self.emit('summary', **summary)
+        print(format_summary(summary))
+
+    def convert(self, output_path):
+        if not self.media_files:
+            raise ConversionError("No media files to convert")
+
+        try:
+            self.workspace = Workspace(self.settings.scratch_dir)
+        except OSError as e:
+            raise ConversionError(f"Could not create a temp workspace: {e}")
+        temp_list_path = self.workspace.path("file_list.txt")
+
+        try:
+            self.check_cancelled()
+            self.enter_phase('probe')
+            self.probe_inputs()
+            self.check_cancelled()
+            self.enter_phase('setup')
+
+            self.bitrate = self.resolve_bitrate()
+            self.check_space(
+                self.bitrate * 1000 / 8 * self.timeline.duration, "the output video",
+                os.path.dirname(os.path.abspath(output_path))
+            )
+
+            # Use detected resolution if no custom resolution specified
+            resolution = self.settings.resolution.strip() or self.detect_resolution()
+
+            encoder = self.encoder = self.select_encoder()
+            print(f"Using encoder {encoder}")
+            self.hw_method = get_capabilities().hw_path(encoder, self.settings.hwaccel)
+            if self.hw_method:
+                print(f"Decoding and scaling with {self.hw_method}")
+            reference = self.plan_stream_copy(resolution, encoder)
+            if reference:
+                self.run_stream_copy(reference, output_path, temp_list_path)
+                return
+
+            if self.settings.pipeline and 'video' not in self.file_types:
+                self.run_pipeline(output_path, resolution, encoder)
+                return
+
+            sequence = None
+            if 'video' not in self.file_types:
+                sequence = detect_image_sequence(self.media_files)
+
+            chunked = self.settings.chunked or self.settings.incremental
+            if (chunked and 'video' not in self.file_types
+                    and not self.settings.target_size):
+                if self.run_chunked(output_path, resolution, encoder, sequence, temp_list_path):
+                    return
+
+            if self.settings.single_pass:
+                if self.run_single_pass(output_path, resolution, encoder, temp_list_path):
+                    return
+                print("Output size unknown, joining the inputs through a concat list")
+
+            if sequence:
+                print(f"Reading image sequence {sequence[0]} from frame {sequence[1]}")
+                self.encode(
+                    self.sequence_input_args(sequence), output_path, resolution,
+                    encoder, frame_count=len(self.media_files)
+                )
+            else:
+                # Irregular selections go through a concat list instead
+                temp_video_map = self.transcode_videos(resolution)
+                self.write_file_list(temp_list_path, temp_video_map)
+                self.encode(
+                    self.concat_input_args(temp_list_path), output_path, resolution, encoder
+                )
+
+        except FileNotFoundError as e:
+            raise ConversionError(f"Could not run ffmpeg: {e}")
+
+        except ConversionCancelled:
+            # Don't leave a half written video behind
+            if self.writing and os.path.exists(self.writing):
+                os.remove(self.writing)
+            raise
+
+        finally:
+            # Clean up temp files
+            self.enter_phase('cleanup')
+            self.temp_bytes = self.workspace.used_bytes()
+            self.workspace.cleanup()
+            self.enter_phase(None)
@@ -0,0 +1,87 @@
+"""Instrumentation events from ConversionEngine.
+
+An engine given on_event(event) calls it with a dict for each of these,
+all with 'event' naming the kind and 'time' as a Unix timestamp:
+
+    phase    a phase of run() ended: phase, seconds
+    process  an ffmpeg exited: label, wall, speed, returncode and, where
+             the platform reports them, max_rss, user_cpu, system_cpu,
+             read_bytes, write_bytes
+    summary  the job ended, see ConversionEngine.summary
+
+Events come from worker threads, callbacks have to be thread safe.
+"""
+import json
+import threading
+
+USAGE_FIELDS = ('user_cpu', 'system_cpu', 'read_bytes', 'write_bytes')
+
+class UsageTotals:
+    """Resource usage added up over every ffmpeg a job ran"""
+
+    def __init__(self):
+        self.processes = 0
+        self.peak_rss = None
+        self.totals = dict.fromkeys(USAGE_FIELDS)
+        self.lock = threading.Lock()
+
+    def add(self, stats):
+        with self.lock:
+            self.processes += 1
+            if stats.get('max_rss') is not None:
+                self.peak_rss = max(self.peak_rss or 0, stats['max_rss'])
+            for field in USAGE_FIELDS:
+                if stats.get(field) is not None:
+                    self.totals[field] = (self.totals[field] or 0) + stats[field]
+
+    def to_dict(self):
+        with self.lock:
+            return dict(self.totals, processes=self.processes, peak_rss=self.peak_rss)
+
+class EventLog:
+    """Appends events to a file as JSON lines. One log can be shared by many jobs."""
+
+    def __init__(self, path):
+        self.file = open(path, "a", encoding='utf-8')
+        self.lock = threading.Lock()
+
+    def __call__(self, event):
+        line = json.dumps(event, default=str)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1024 or unit == "GB":
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+
+def format_summary(summary):
+    """Short human readable version of a job summary"""
+    lines = [f"Job {summary['status']} in {summary['wall']:.1f}s"]
+    if summary.get('speed'):
+        lines[0] += f" ({summary['speed']:.2f}x real time)"
+    phases = summary.get('phases') or {}
+    if phases:
+        lines.append("Phases: " + ", ".join(
+            f"{name} {seconds:.2f}s" for name, seconds in phases.items()
+        ))
+    usage = [f"{summary['processes']} ffmpeg runs"]
+    cpu = (summary.get('user_cpu') or 0) + (summary.get('system_cpu') or 0)
+    if summary.get('user_cpu') is not None:
+        usage.append(f"CPU {cpu:.1f}s")
+    if summary.get('peak_rss') is not None:
+        usage.append(f"peak RSS {format_bytes(summary['peak_rss'])}")
+    if summary.get('read_bytes') is not None:
+        usage.append(f"read {format_bytes(summary['read_bytes'])}")
+    if summary.get('write_bytes') is not None:
+        usage.append(f"wrote {format_bytes(summary['write_bytes'])}")
+    if summary.get('temp_bytes') is not None:
+        usage.append(f"temp {format_bytes(summary['temp_bytes'])}")
+    lines.append(", ".join(usage))
+    return "\n".join(lines)
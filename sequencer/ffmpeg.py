@@ -0,0 +1,145 @@
+"""Run ffmpeg and read its progress as structured events.
+
+Progress comes from `-progress pipe:1`, which writes key=value blocks to
+stdout, so nothing has to be scraped out of the human readable stats on
+stderr. stderr is only kept as a short ring buffer for error messages.
+"""
+import io
+import subprocess
+import threading
+import time
+from collections import deque
+
+from .system import (CREATE_NO_WINDOW, kill_process, process_group_args, resume_process,
+                     suspend_process, wait_with_usage)
+
+class FFmpegProgress:
+    """One progress block from ffmpeg. Fields ffmpeg reported as N/A are None."""
+
+    def __init__(self, frame=None, fps=None, out_time=None, speed=None,
+                 total_size=None, bitrate=None, done=False):
+        self.frame = frame
+        self.fps = fps  # Frames encoded per second
+        self.out_time = out_time  # Seconds of output written
+        self.speed = speed  # Multiple of real time
+        self.total_size = total_size  # Bytes written so far
+        self.bitrate = bitrate  # kbps
+        self.done = done  # True for ffmpeg's last block
+
+def parse_number(value, cast=float):
+    try:
+        return cast(value.strip().rstrip('x').replace('kbits/s', ''))
+    except (AttributeError, ValueError):
+        return None
+
+def parse_progress(fields):
+    """FFmpegProgress from a dict of one block's key=value pairs"""
+    out_time_us = parse_number(fields.get('out_time_us'), int)
+    return FFmpegProgress(
+        frame=parse_number(fields.get('frame'), int),
+        fps=parse_number(fields.get('fps')),
+        out_time=max(0.0, out_time_us / 1000000) if out_time_us is not None else None,
+        speed=parse_number(fields.get('speed')),
+        total_size=parse_number(fields.get('total_size'), int),
+        bitrate=parse_number(fields.get('bitrate')),
+        done=fields.get('progress') == 'end',
+    )
+
+def progress_command(cmd):
+    """cmd with progress sent to stdout and the stats line turned off"""
+    return cmd[:1] + ["-progress", "pipe:1", "-nostats"] + cmd[1:]
+
+class FFmpegProcess:
+    """An ffmpeg process whose progress is read from stdout.
+
+    on_progress(FFmpegProgress) is called from whichever thread calls
+    wait(). The last stderr_lines lines of stderr are kept in stderr_tail.
+    ffmpeg gets its own process group unless new_group is False, so it can
+    be paused and killed without touching this process.
+    """
+
+    def __init__(self, cmd, on_progress=None, stdin=None, stderr_lines=50, new_group=True):
+        self.cmd = progress_command(cmd)
+        self.on_progress = on_progress
+        self.stderr_tail = deque(maxlen=stderr_lines)
+        popen_args = process_group_args() if new_group else {'creationflags': CREATE_NO_WINDOW}
+        self.process = subprocess.Popen(
+            self.cmd,
+            stdin=stdin if stdin is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            **popen_args
+        )
+        self.new_group = new_group
+        self.start_time = time.perf_counter()
+        self.wall = None  # Seconds from start to exit, once it has exited
+        self.usage = None  # Resource usage from wait_with_usage()
+        self.last_progress = None
+        # stderr has to be drained or ffmpeg blocks once the pipe fills
+        self.stderr_thread = threading.Thread(target=self.read_stderr, daemon=True)
+        self.stderr_thread.start()
+
+    @property
+    def stdin(self):
+        return self.process.stdin
+
+    def read_stderr(self):
+        stderr = io.TextIOWrapper(self.process.stderr, encoding='utf-8', errors='replace')
+        for line in stderr:
+            if line.strip():
+                self.stderr_tail.append(line)
+        stderr.close()
+
+    def read_progress(self):
+        stdout = io.TextIOWrapper(self.process.stdout, encoding='utf-8', errors='replace')
+        fields = {}
+        for line in stdout:
+            key, sep, value = line.strip().partition('=')
+            if not sep:
+                continue
+            fields[key] = value
+            # Every block ends with a progress= line
+            if key == 'progress':
+                self.last_progress = parse_progress(fields)
+                if self.on_progress:
+                    self.on_progress(self.last_progress)
+                fields = {}
+        stdout.close()
+
+    def wait(self):
+        """Report progress until ffmpeg exits, then return its exit code"""
+        self.read_progress()
+        returncode, self.usage = wait_with_usage(self.process)
+        self.wall = time.perf_counter() - self.start_time
+        self.stderr_thread.join()
+        return returncode
+
+    def poll(self):
+        return self.process.poll()
+
+    def suspend(self):
+        if self.new_group:
+            suspend_process(self.process)
+
+    def resume(self):
+        if self.new_group:
+            resume_process(self.process)
+
+    def kill(self):
+        if self.new_group:
+            kill_process(self.process)
+        elif self.process.poll() is None:
+            self.process.kill()
+
+    def stats(self):
+        """Wall time, last reported speed and resource usage, for instrumentation"""
+        stats = {
+            'wall': self.wall,
+            'speed': self.last_progress.speed if self.last_progress else None,
+            'returncode': self.process.returncode,
+        }
+        stats.update(self.usage or {})
+        return stats
+
+    def error_output(self, lines=20):
+        return "".join(list(self.stderr_tail)[-lines:])
@@ -0,0 +1,1094 @@
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+import os
+from pathlib import Path
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tkinterdnd2 import DND_FILES, TkinterDnD
+
+from .conform import CONFORM_MODES
+from .encoders import get_capabilities
+from .engine import ConversionCancelled, ConversionEngine, ConversionSettings
+from .jobs import FAILED, RUNNING, Job, JobQueue, format_duration
+from .probe import get_file_type, probe_files
+from .timeline import MediaList
+
+class ModernButton(tk.Button):
+    def __init__(self, master=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.configure(
+            bg="#2c3e50",
+            fg="white",
+            activebackground="#34495e",
+            activeforeground="white",
+            relief=tk.FLAT,
+            padx=20,
+            pady=10,
+            font=("Segoe UI", 10),
+            cursor="hand2"
+        )
+        self.bind("<Enter>", self.on_enter)
+        self.bind("<Leave>", self.on_leave)
+
+    def on_enter(self, e):
+        self['background'] = "#34495e"
+
+    def on_leave(self, e):
+        self['background'] = "#2c3e50"
+
+class ProgressDispatcher:
+    """Hands progress from worker threads to the Tk thread.
+
+    post(key, value) can be called from any thread. Only the latest value
+    per key is kept, and they're delivered to callback(key, value) at most
+    once per interval, so a fast encode can't flood the event loop. The
+    interval grows when delivering is slow. Nothing is scheduled while no
+    updates arrive, so it goes quiet by itself once a job finishes.
+    """
+    
+    def __init__(self, root, callback, min_interval=0.1, max_interval=1.0):
+        self.root = root
+        self.callback = callback
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.latest = {}
+        self.scheduled = False
+        self.last_flush = 0.0
+        self.lock = threading.Lock()
+    
+    def post(self, key, value):
+        with self.lock:
+            # Re-insert so keys are delivered in the order they last changed
+            self.latest.pop(key, None)
+            self.latest[key] = value
+            if self.scheduled:
+                return
+            self.scheduled = True
+            delay = self.interval - (time.time() - self.last_flush)
+        self.root.after(max(0, int(delay * 1000)), self.flush)
+    
+    def flush(self):
+        with self.lock:
+            updates = self.latest
+            self.latest = {}
+            self.scheduled = False
+        start = time.perf_counter()
+        for key, value in updates.items():
+            self.callback(key, value)
+        cost = time.perf_counter() - start
+        self.last_flush = time.time()
+        # Keep redrawing to a small share of the Tk thread's time
+        self.interval = min(self.max_interval, max(self.min_interval, cost * 5))
+
+class ProgressWindow(tk.Toplevel):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Converting...")
+        
+        # Window setup
+        window_width = 400
+        window_height = 260
+        screen_width = self.winfo_screenwidth()
+        screen_height = self.winfo_screenheight()
+        x = (screen_width - window_width) // 2
+        y = (screen_height - window_height) // 2
+        self.geometry(f"{window_width}x{window_height}+{x}+{y}")
+        
+        self.configure(bg="#1a1a1a")
+        self.resizable(False, False)
+        self.transient(parent)
+        self.grab_set()
+        
+        # Progress variables
+        self.progress_var = tk.DoubleVar()
+        self.status_text = tk.StringVar(value="Initializing...")
+        self.fps_text = tk.StringVar(value="Encoding speed: calculating...")
+        self.time_text = tk.StringVar(value="Time remaining: calculating...")
+        
+        # Status labels
+        self.status_label = tk.Label(
+            self,
+            textvariable=self.status_text,
+            bg="#1a1a1a",
+            fg="white",
+            font=("Segoe UI", 10)
+        )
+        self.status_label.pack(pady=10)
+        
+        self.fps_label = tk.Label(
+            self,
+            textvariable=self.fps_text,
+            bg="#1a1a1a",
+            fg="white",
+            font=("Segoe UI", 10)
+        )
+        self.fps_label.pack(pady=5)
+        
+        self.time_label = tk.Label(
+            self,
+            textvariable=self.time_text,
+            bg="#1a1a1a",
+            fg="white",
+            font=("Segoe UI", 10)
+        )
+        self.time_label.pack(pady=5)
+        
+        # Progress bar
+        self.progress_bar = ttk.Progressbar(
+            self,
+            variable=self.progress_var,
+            mode='determinate',
+            length=350
+        )
+        self.progress_bar.pack(pady=10)
+        
+        button_frame = tk.Frame(self, bg="#1a1a1a")
+        button_frame.pack(pady=5)
+        self.pause_button = ModernButton(
+            button_frame, text="Pause", command=self.toggle_pause, pady=4
+        )
+        self.pause_button.pack(side="left", padx=5)
+        self.cancel_button = ModernButton(
+            button_frame, text="Cancel", command=self.cancel, pady=4
+        )
+        self.cancel_button.pack(side="left", padx=5)
+        
+        # Closing the window stops the conversion
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
+        
+        self.engine = None
+        
+        # For FPS calculation
+        self.last_frame = 0
+        self.last_time = time.time()
+        self.start_time = time.time()
+    
+    def toggle_pause(self):
+        if self.engine is None:
+            return
+        if self.engine.paused:
+            self.engine.resume()
+            self.pause_button.configure(text="Pause")
+        else:
+            self.engine.pause()
+            self.pause_button.configure(text="Resume")
+    
+    def cancel(self):
+        """Stop the conversion, the window closes once the engine has cleaned up"""
+        if self.engine is None:
+            self.destroy()
+            return
+        self.engine.cancel()
+        self.pause_button.configure(state=tk.DISABLED)
+        self.cancel_button.configure(state=tk.DISABLED)
+
+class QueueWindow(tk.Toplevel):
+    """Lists queued jobs with their own progress, ETA and final status"""
+    
+    def __init__(self, parent, job_queue):
+        super().__init__(parent)
+        self.title("Job Queue")
+        self.geometry("560x360")
+        self.job_queue = job_queue
+        self.configure(bg="#1a1a1a")
+        
+        columns = ("status", "progress", "eta")
+        self.tree = ttk.Treeview(self, columns=columns, height=10)
+        self.tree.heading("#0", text="Output")
+        self.tree.heading("status", text="Status")
+        self.tree.heading("progress", text="Progress")
+        self.tree.heading("eta", text="Time remaining")
+        self.tree.column("#0", width=200)
+        self.tree.column("status", width=160)
+        self.tree.column("progress", width=80, anchor=tk.E)
+        self.tree.column("eta", width=100, anchor=tk.E)
+        self.tree.pack(fill="both", expand=True, padx=10, pady=10)
+        
+        button_frame = tk.Frame(self, bg="#1a1a1a")
+        button_frame.pack(pady=(0, 10))
+        for text, action in (("Pause", self.job_queue.pause),
+                             ("Resume", self.job_queue.resume),
+                             ("Cancel", self.job_queue.cancel)):
+            ModernButton(
+                button_frame, text=text, pady=4,
+                command=lambda action=action: self.apply_to_selection(action)
+            ).pack(side="left", padx=5)
+        
+        # Closing just hides the window, jobs keep running
+        self.protocol("WM_DELETE_WINDOW", self.withdraw)
+    
+    def apply_to_selection(self, action):
+        selected = set(self.tree.selection())
+        for job in list(self.job_queue.jobs):
+            if str(job.id) in selected:
+                action(job)
+    
+    def update_job(self, job):
+        item = str(job.id)
+        eta = format_duration(job.eta) if job.eta is not None else ""
+        values = (job.status_text, f"{job.progress:.1f}%", eta)
+        if self.tree.exists(item):
+            self.tree.item(item, values=values)
+        else:
+            self.tree.insert("", tk.END, iid=item, text=job.name, values=values)
+
+class DraggableListbox(tk.Listbox):
+    def __init__(self, master=None, app=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.app = app  # Store reference to main application
+        self.bind('<Button-1>', self.on_click)
+        self.bind('<B1-Motion>', self.on_drag)
+        self.bind('<ButtonRelease-1>', self.on_drop)
+        
+        # For drag and drop files from outside
+        self.drop_target_register(DND_FILES)
+        self.dnd_bind('<<Drop>>', self.on_drop_file)
+        
+        self._drag_data = {'item': None, 'index': None}
+    
+    def on_click(self, event):
+        index = self.nearest(event.y)
+        if index >= 0:
+            self._drag_data['item'] = self.get(index)
+            self._drag_data['index'] = index
+    
+    def on_drag(self, event):
+        if self._drag_data['item']:
+            # Get the new position
+            new_index = self.nearest(event.y)
+            if new_index >= 0:
+                # Move item to new position
+                old_index = self._drag_data['index']
+                if new_index != old_index:
+                    self.app.move_item(old_index, new_index)
+                    self._drag_data['index'] = new_index
+    
+    def on_drop(self, event):
+        self._drag_data = {'item': None, 'index': None}
+    
+    def on_drop_file(self, event):
+        files = self.tk.splitlist(event.data)
+        self.app.add_files(files)  # Use app reference instead of master.master
+
+class ImageToVideoConverter:
+    def __init__(self):
+        self.root = TkinterDnD.Tk()
+        self.root.title("Image to Video Converter")
+        self.root.geometry("600x700")
+        self.root.configure(bg="#1a1a1a")
+        
+        # Variables
+        self.media = MediaList()  # Input files in output order with their metadata
+        self.fps = tk.StringVar(value="30")
+        self.status_text = tk.StringVar(value="No files selected")
+        self.use_gpu = tk.BooleanVar(value=True)
+        self.stream_copy = tk.BooleanVar(value=True)
+        self.pipeline = tk.BooleanVar(value=False)
+        self.single_pass = tk.BooleanVar(value=False)
+        self.chunked = tk.BooleanVar(value=False)
+        self.incremental = tk.BooleanVar(value=False)
+        self.bitrate = tk.StringVar(value="20000")  # Default 20,000 kbps (20 Mbps)
+        self.resolution = tk.StringVar(value="")   # Empty means original size
+        self.conform = tk.StringVar(value="fit")  # How other shapes fit the output
+        self.target_size = tk.StringVar(value="")  # Empty means no target size
+        self.size_unit = tk.StringVar(value="MB")  # MB or KB
+        self.parallel_jobs = tk.StringVar(value="1")
+        self.job_queue = None
+        self.queue_window = None
+        self.progress_window = None
+        self.queue_dispatcher = ProgressDispatcher(
+            self.root, lambda job_id, job: self.on_job_update(job)
+        )
+        self.listbox = None
+        self.pending_probes = 0
+        self.probe_executor = ThreadPoolExecutor(
+            max_workers=min(8, (os.cpu_count() or 1) + 4)
+        )
+        
+        # Add timing variables
+        self.last_time = time.time()
+        self.start_time = time.time()
+        
+        self.create_widgets()
+        
+        # Work out which encoders ffmpeg can use before the first conversion
+        self.probe_executor.submit(self.detect_encoders)
+        
+    def detect_encoders(self):
+        hardware = get_capabilities().hardware_encoders('h264')
+        text = f"Use GPU encoding ({hardware[0]})" if hardware else "Use GPU encoding (none found)"
+        self.root.after(0, lambda: self.gpu_check.config(text=text))
+        
+    def create_widgets(self):
+        # Main container
+        main_frame = tk.Frame(self.root, bg="#1a1a1a", padx=20, pady=20)
+        main_frame.pack(expand=True, fill="both")
+        
+        # Title
+        title_label = tk.Label(
+            main_frame,
+            text="Image to Video Converter",
+            font=("Segoe UI", 16, "bold"),
+            bg="#1a1a1a",
+            fg="white"
+        )
+        title_label.pack(pady=(0, 20))
+        
+        # File selection
+        select_btn = ModernButton(
+            main_frame,
+            text="Select Media Files",
+            command=self.select_media
+        )
+        select_btn.pack(pady=10)
+        
+        # Status frame
+        status_frame = tk.Frame(main_frame, bg="#2c3e50", padx=10, pady=10)
+        status_frame.pack(fill="x", pady=10)
+        
+        status_label = tk.Label(
+            status_frame,
+            textvariable=self.status_text,
+            wraplength=400,
+            bg="#2c3e50",
+            fg="white",
+            font=("Segoe UI", 10)
+        )
+        status_label.pack()
+        
+        # Media list frame
+        list_frame = tk.Frame(main_frame, bg="#2c3e50", padx=10, pady=10)
+        list_frame.pack(fill="both", expand=True, pady=10)
+        
+        # Scrollbar
+        scrollbar = tk.Scrollbar(list_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # Listbox
+        self.listbox = DraggableListbox(
+            list_frame,
+            app=self,  # Pass reference to main application
+            bg="#2c3e50",
+            fg="white",
+            selectmode=tk.SINGLE,
+            height=6,
+            yscrollcommand=scrollbar.set,
+            font=("Segoe UI", 10)
+        )
+        self.listbox.pack(fill="both", expand=True)
+        scrollbar.config(command=self.listbox.yview)
+        
+        # Reorder buttons frame
+        reorder_frame = tk.Frame(main_frame, bg="#1a1a1a")
+        reorder_frame.pack(pady=5)
+        
+        move_up_btn = ModernButton(
+            reorder_frame,
+            text="↑",
+            command=self.move_up,
+            padx=10
+        )
+        move_up_btn.pack(side=tk.LEFT, padx=5)
+        
+        move_down_btn = ModernButton(
+            reorder_frame,
+            text="↓",
+            command=self.move_down,
+            padx=10
+        )
+        move_down_btn.pack(side=tk.LEFT, padx=5)
+        
+        # Add delete button next to up/down buttons
+        delete_btn = ModernButton(
+            reorder_frame,
+            text="×",
+            command=self.delete_selected,
+            padx=10
+        )
+        delete_btn.pack(side=tk.LEFT, padx=5)
+        
+        # Settings frame - modified to allow wrapping
+        settings_frame = tk.Frame(main_frame, bg="#1a1a1a")
+        settings_frame.pack(pady=10, fill="x")
+        
+        # Container for settings rows
+        settings_row1 = tk.Frame(settings_frame, bg="#1a1a1a")
+        settings_row1.pack(pady=(0, 5), fill="x")
+        
+        settings_row2 = tk.Frame(settings_frame, bg="#1a1a1a")
+        settings_row2.pack(fill="x")
+        
+        # FPS and Bitrate in first row
+        fps_frame = tk.Frame(settings_row1, bg="#1a1a1a")
+        fps_frame.pack(side=tk.LEFT, padx=10)
+        
+        fps_label = tk.Label(
+            fps_frame,
+            text="Output FPS:",
+            bg="#1a1a1a",
+            fg="white",
+            font=("Segoe UI", 10)
+        )
+        fps_label.pack(side=tk.LEFT, padx=5)
+        
+        fps_entry = tk.Entry(
+            fps_frame,
+            textvariable=self.fps,
+            width=5,
+            bg="#2c3e50",
+            fg="white",
+            insertbackground="white",
+            relief=tk.FLAT,
+            font=("Segoe UI", 10)
+        )
+        fps_entry.pack(side=tk.LEFT, padx=5)
+        
+        bitrate_frame = tk.Frame(settings_row1, bg="#1a1a1a")
+        bitrate_frame.pack(side=tk.LEFT, padx=10)
+        
+        bitrate_label = tk.Label(
+            bitrate_frame,
+            text="Bitrate (kbps):",
+            bg="#1a1a1a",
+            fg="white",
+            font=("Segoe UI", 10)
+        )
+        bitrate_label.pack(side=tk.LEFT, padx=5)
+        
+        bitrate_entry = tk.Entry(
+            bitrate_frame,
+            textvariable=self.bitrate,
+            width=8,
+            bg="#2c3e50",
+            fg="white",
+            insertbackground="white",
+            relief=tk.FLAT,
+            font=("Segoe UI", 10)
+        )
+        bitrate_entry.pack(side=tk.LEFT, padx=5)
+        
+        # Resolution and GPU checkbox in second row
+        resolution_frame = tk.Frame(settings_row2, bg="#1a1a1a")
+        resolution_frame.pack(side=tk.LEFT, padx=10)
+        
+        resolution_label = tk.Label(
+            resolution_frame,
+            text="Resolution:",
+            bg="#1a1a1a",
+            fg="white",
+            font=("Segoe UI", 10)
+        )
+        resolution_label.pack(side=tk.LEFT, padx=5)
+        
+        resolution_entry = tk.Entry(
+            resolution_frame,
+            textvariable=self.resolution,
+            width=10,
+            bg="#2c3e50",
+            fg="white",
+            insertbackground="white",
+            relief=tk.FLAT,
+            font=("Segoe UI", 10)
+        )
+        resolution_entry.pack(side=tk.LEFT, padx=5)
+        
+        # Letterbox, stretch or crop inputs of a different shape
+        conform_menu = ttk.Combobox(
+            resolution_frame,
+            textvariable=self.conform,
+            values=list(CONFORM_MODES),
+            width=5,
+            state="readonly"
+        )
+        conform_menu.pack(side=tk.LEFT, padx=5)
+        
+        # GPU checkbox in second row
+        self.gpu_check = gpu_check = tk.Checkbutton(
+            settings_row2,  # Changed parent to settings_row2
+            text="Use GPU encoding",
+            variable=self.use_gpu,
+            bg="#1a1a1a",
+            fg="white",
+            selectcolor="#2c3e50",
+            activebackground="#1a1a1a",
+            activeforeground="white",
+            font=("Segoe UI", 10)
+        )
+        gpu_check.pack(side=tk.LEFT, padx=10)
+        
+        # Join matching videos without re-encoding them
+        stream_copy_check = tk.Checkbutton(
+            settings_row2,
+            text="Copy matching videos",
+            variable=self.stream_copy,
+            bg="#1a1a1a",
+            fg="white",
+            selectcolor="#2c3e50",
+            activebackground="#1a1a1a",
+            activeforeground="white",
+            font=("Segoe UI", 10)
+        )
+        stream_copy_check.pack(side=tk.LEFT, padx=10)
+        
+        # Join videos in one ffmpeg instead of transcoding them to temp files
+        single_pass_check = tk.Checkbutton(
+            settings_row2,
+            text="Single pass",
+            variable=self.single_pass,
+            bg="#1a1a1a",
+            fg="white",
+            selectcolor="#2c3e50",
+            activebackground="#1a1a1a",
+            activeforeground="white",
+            font=("Segoe UI", 10)
+        )
+        single_pass_check.pack(side=tk.LEFT, padx=10)
+        
+        # Add a third row for target size settings
+        settings_row3 = tk.Frame(settings_frame, bg="#1a1a1a")
+        settings_row3.pack(fill="x")
+
+        target_size_frame = tk.Frame(settings_row3, bg="#1a1a1a")
+        target_size_frame.pack(side=tk.LEFT, padx=10)
+
+        target_size_label = tk.Label(
+            target_size_frame,
+            text="Target Size:",
+            bg="#1a1a1a",
+            fg="white",
+            font=("Segoe UI", 10)
+        )
+        target_size_label.pack(side=tk.LEFT, padx=5)
+
+        target_size_entry = tk.Entry(
+            target_size_frame,
+            textvariable=self.target_size,
+            width=6,
+            bg="#2c3e50",
+            fg="white",
+            insertbackground="white",
+            relief=tk.FLAT,
+            font=("Segoe UI", 10)
+        )
+        target_size_entry.pack(side=tk.LEFT, padx=5)
+
+        # Unit dropdown (MB/KB)
+        size_unit_menu = ttk.Combobox(
+            target_size_frame,
+            textvariable=self.size_unit,
+            values=["MB", "KB"],
+            width=3,
+            state="readonly"
+        )
+        size_unit_menu.pack(side=tk.LEFT, padx=5)
+        
+        # Number of queued jobs encoded at once
+        parallel_frame = tk.Frame(settings_row3, bg="#1a1a1a")
+        parallel_frame.pack(side=tk.LEFT, padx=10)
+        
+        parallel_label = tk.Label(
+            parallel_frame,
+            text="Parallel jobs:",
+            bg="#1a1a1a",
+            fg="white",
+            font=("Segoe UI", 10)
+        )
+        parallel_label.pack(side=tk.LEFT, padx=5)
+        
+        parallel_spinbox = tk.Spinbox(
+            parallel_frame,
+            from_=1,
+            to=max(1, os.cpu_count() or 1),
+            textvariable=self.parallel_jobs,
+            width=3,
+            bg="#2c3e50",
+            fg="white",
+            buttonbackground="#2c3e50",
+            relief=tk.FLAT,
+            font=("Segoe UI", 10),
+            command=self.update_parallel_jobs
+        )
+        parallel_spinbox.pack(side=tk.LEFT, padx=5)
+        
+        # Fourth row for image sequence options
+        settings_row4 = tk.Frame(settings_frame, bg="#1a1a1a")
+        settings_row4.pack(fill="x")
+        
+        pipeline_check = tk.Checkbutton(
+            settings_row4,
+            text="Decode images in parallel (needs Pillow)",
+            variable=self.pipeline,
+            bg="#1a1a1a",
+            fg="white",
+            selectcolor="#2c3e50",
+            activebackground="#1a1a1a",
+            activeforeground="white",
+            font=("Segoe UI", 10)
+        )
+        pipeline_check.pack(side=tk.LEFT, padx=10)
+        
+        # Split long image sequences into chunks encoded side by side
+        chunked_check = tk.Checkbutton(
+            settings_row4,
+            text="Encode in parallel chunks",
+            variable=self.chunked,
+            bg="#1a1a1a",
+            fg="white",
+            selectcolor="#2c3e50",
+            activebackground="#1a1a1a",
+            activeforeground="white",
+            font=("Segoe UI", 10)
+        )
+        chunked_check.pack(side=tk.LEFT, padx=10)
+        
+        # Keep chunks between runs and only redo the ones that changed
+        incremental_check = tk.Checkbutton(
+            settings_row4,
+            text="Reuse unchanged chunks",
+            variable=self.incremental,
+            bg="#1a1a1a",
+            fg="white",
+            selectcolor="#2c3e50",
+            activebackground="#1a1a1a",
+            activeforeground="white",
+            font=("Segoe UI", 10)
+        )
+        incremental_check.pack(side=tk.LEFT, padx=10)
+        
+        # Convert and queue buttons
+        buttons_frame = tk.Frame(main_frame, bg="#1a1a1a")
+        buttons_frame.pack(pady=20)
+        
+        convert_btn = ModernButton(
+            buttons_frame,
+            text="Convert to Video",
+            command=self.convert_to_video
+        )
+        convert_btn.pack(side=tk.LEFT, padx=5)
+        
+        queue_btn = ModernButton(
+            buttons_frame,
+            text="Add to Queue",
+            command=self.add_to_queue
+        )
+        queue_btn.pack(side=tk.LEFT, padx=5)
+        
+    def select_media(self):
+        """Modified to filter file types based on current selection"""
+        current_type = self.media[0].file_type if self.media else None
+        
+        if current_type == 'video':
+            filetypes = [
+                ("Video files", "*.mp4 *.mov *.avi *.mkv"),
+                ("All files", "*.*")
+            ]
+        elif current_type == 'image':
+            filetypes = [
+                ("Image files", "*.png *.jpg *.jpeg *.tiff *.bmp"),
+                ("All files", "*.*")
+            ]
+        else:
+            filetypes = [
+                ("Media files", "*.png *.jpg *.jpeg *.tiff *.bmp *.mp4 *.mov *.avi *.mkv"),
+                ("Image files", "*.png *.jpg *.jpeg *.tiff *.bmp"),
+                ("Video files", "*.mp4 *.mov *.avi *.mkv"),
+                ("All files", "*.*")
+            ]
+        
+        files = filedialog.askopenfilenames(
+            title="Select Media Files",
+            filetypes=filetypes
+        )
+        
+        if files:
+            self.add_files(files)
+    
+    def add_files(self, files):
+        """Add new files to the existing list"""
+        # First check if we already have files and get their type
+        current_type = None
+        if self.media:
+            current_type = self.media[0].file_type
+        
+        entries = []
+        for file in files:
+            if not isinstance(file, str):
+                file = str(file)
+            
+            # Determine file type
+            new_type = get_file_type(file)
+            
+            # Check if this would mix types
+            if current_type and new_type != current_type:
+                messagebox.showerror(
+                    "Error", 
+                    "Cannot mix images and videos. Please use only one type of media."
+                )
+                break
+            
+            # If this is the first file, set the current type
+            if not current_type:
+                current_type = new_type
+            
+            entries.append((file, new_type))
+        
+        first_new = len(self.media)
+        new_items = self.media.extend(entries)
+        
+        # Videos show up straight away and get their bitrate filled in by the
+        # probe pool, so a big drop doesn't freeze the window
+        for item in new_items:
+            if item.file_type == 'video':
+                self.pending_probes += 1
+                self.probe_executor.submit(self.probe_in_background, item)
+        
+        # One insert for the whole batch, the existing rows are left alone
+        self.append_rows(first_new)
+        self.update_status()
+    
+    def probe_in_background(self, item):
+        """Runs on the probe pool, hands the result back to the Tk thread"""
+        try:
+            metadata, _ = probe_files([item.path], ['video'])
+            info = metadata[0]
+        except Exception as e:
+            print(f"Error probing {item.path}: {e}")
+            info = None
+        try:
+            self.root.after(0, lambda: self.on_probe_result(item, info))
+        except (RuntimeError, tk.TclError):  # Window was closed
+            pass
+    
+    def on_probe_result(self, item, info):
+        self.pending_probes -= 1
+        # Default 20Mbps if we can't detect the bitrate
+        bitrate = info.get('bitrate') if info and info.get('bitrate') else 20000
+        
+        # The entry may have moved or been deleted while probing
+        index = self.media.set_probe(item, info or {}, bitrate)
+        if index is not None:
+            self.refresh_row(index)
+        
+        self.update_average_bitrate()
+        self.update_status()
+    
+    def update_average_bitrate(self):
+        avg_bitrate = self.media.average_bitrate()
+        if avg_bitrate is not None:
+            self.bitrate.set(str(avg_bitrate))
+    
+    def update_status(self):
+        status = f"Selected {len(self.media)} files"
+        if self.pending_probes:
+            status += f" (probing {self.pending_probes}...)"
+        elif self.media:
+            try:
+                fps = float(self.fps.get())
+            except ValueError:
+                fps = 0
+            if fps > 0:
+                status += f", {format_duration(self.media.duration(fps))} at {fps:g} fps"
+        self.status_text.set(status)
+    
+    def delete_selected(self):
+        """Delete selected item from the list"""
+        selection = self.listbox.curselection()
+        if not selection:
+            return
+            
+        idx = selection[0]
+        self.media.pop(idx)
+        
+        self.update_average_bitrate()
+        self.listbox.delete(idx)
+        self.update_status()
+        
+        if idx < self.listbox.size():
+            self.listbox.selection_set(idx)
+        elif self.listbox.size() > 0:
+            self.listbox.selection_set(idx - 1)
+    
+    def move_item(self, old_index, new_index):
+        """Move item from old_index to new_index"""
+        self.media.move(old_index, new_index)
+        # Only the moved row changes, everything between shifts by itself
+        self.listbox.delete(old_index)
+        self.listbox.insert(new_index, self.format_entry(new_index))
+        self.listbox.selection_set(new_index)
+        self.listbox.see(new_index)
+    
+    def format_entry(self, i):
+        item = self.media[i]
+        filename = os.path.basename(item.path)
+        label = f"[{item.file_type.upper()}] {filename}"
+        if item.file_type == 'video':
+            if item.bitrate is None:
+                label += " (probing...)"
+            else:
+                label += f" ({item.bitrate} kbps"
+                duration = item.info.get('duration')
+                if duration:
+                    label += f", {duration:.1f}s"
+                label += ")"
+        return label
+    
+    def refresh_row(self, i):
+        selected = i in self.listbox.curselection()
+        self.listbox.delete(i)
+        self.listbox.insert(i, self.format_entry(i))
+        if selected:
+            self.listbox.selection_set(i)
+    
+    def append_rows(self, start):
+        """Add rows for media items from start on to the end of the listbox"""
+        entries = [self.format_entry(i) for i in range(start, len(self.media))]
+        if entries:
+            self.listbox.insert(tk.END, *entries)
+        
+    def move_up(self):
+        selection = self.listbox.curselection()
+        if not selection or selection[0] == 0:
+            return
+        
+        idx = selection[0]
+        self.move_item(idx, idx - 1)
+
+    def move_down(self):
+        selection = self.listbox.curselection()
+        if not selection or selection[0] == len(self.media) - 1:
+            return
+        
+        idx = selection[0]
+        self.move_item(idx, idx + 1)
+        
+    def apply_progress(self, progress_window, kind, value):
+        """Show the latest engine status or ProgressUpdate in the progress window"""
+        try:
+            if kind == 'status':
+                progress_window.status_text.set(value)
+                return
+            
+            update = value
+            progress = update.percent
+            
+            current_time = time.time()
+            time_diff = current_time - self.last_time
+            if time_diff >= 0.5:  # Update every half second
+                # Encoding FPS as reported by ffmpeg
+                if update.fps is not None:
+                    speed = f" ({update.speed:.2f}x)" if update.speed else ""
+                    progress_window.fps_text.set(
+                        f"Encoding speed: {update.fps:.1f} fps{speed}"
+                    )
+                
+                # Calculate estimated time remaining
+                elapsed_time = current_time - self.start_time
+                if progress > 0:
+                    total_time = elapsed_time * 100 / progress
+                    remaining_time = total_time - elapsed_time
+                    progress_window.time_text.set(
+                        f"Time remaining: {format_duration(remaining_time)}"
+                    )
+                
+                self.last_time = current_time
+            
+            progress_window.progress_var.set(progress)
+            progress_window.status_text.set(update.detail)
+            
+        except tk.TclError:  # Window was closed
+            pass
+        
+    def get_settings(self):
+        """Read the settings widgets, showing an error and returning None if invalid"""
+        try:
+            fps = float(self.fps.get().strip())
+            if fps <= 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid FPS!")
+            return None
+        
+        # An invalid target size is ignored, same as leaving it empty
+        target_size = None
+        try:
+            target_size = float(self.target_size.get().strip())
+            if target_size <= 0:
+                target_size = None
+        except ValueError:
+            pass
+        
+        # The bitrate box may be left empty when encoding to a target size
+        bitrate = self.bitrate.get().strip().replace(',', '')
+        try:
+            if not bitrate and target_size is not None:
+                bitrate = 20000
+            bitrate = int(bitrate)
+            if bitrate <= 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid bitrate in kbps!")
+            return None
+        
+        return ConversionSettings(
+            fps=fps,
+            bitrate=bitrate,
+            resolution=self.resolution.get().strip(),
+            conform=self.conform.get(),
+            target_size=target_size,
+            size_unit=self.size_unit.get(),
+            use_gpu=self.use_gpu.get(),
+            stream_copy=self.stream_copy.get(),
+            pipeline=self.pipeline.get(),
+            single_pass=self.single_pass.get(),
+            chunked=self.chunked.get(),
+            incremental=self.incremental.get()
+        )
+    
+    def convert_to_video(self):
+        if not self.media:
+            messagebox.showerror("Error", "Please select media files first!")
+            return
+        
+        settings = self.get_settings()
+        if settings is None:
+            return
+
+        # Get save location
+        save_path = filedialog.asksaveasfilename(
+            defaultextension=".mp4",
+            initialdir=str(Path(self.media[0].path).parent.parent),
+            title="Save Video As",
+            filetypes=[("MP4 files", "*.mp4")]
+        )
+        
+        if not save_path:
+            return
+            
+        # Create and show progress window
+        progress_window = ProgressWindow(self.root)
+        progress_window.output_file = save_path
+        
+        # Store progress window reference
+        self.progress_window = progress_window
+        
+        dispatcher = ProgressDispatcher(
+            self.root,
+            lambda kind, value: self.apply_progress(progress_window, kind, value)
+        )
+        engine = ConversionEngine(
+            self.media.paths,
+            self.media.file_types,
+            settings,
+            on_progress=lambda update: dispatcher.post('progress', update),
+            on_status=lambda text: dispatcher.post('status', text)
+        )
+        progress_window.engine = engine
+        
+        def conversion_thread():
+            try:
+                # Reset timing variables
+                self.last_time = time.time()
+                self.start_time = time.time()
+                
+                engine.run(save_path)
+                
+                def show_success():
+                    messagebox.showinfo("Success", "Video created successfully!")
+                self.root.after(0, show_success)
+                
+            except ConversionCancelled:
+                print("Conversion cancelled")
+            
+            except Exception as error:
+                self.root.after(0, lambda e=error: messagebox.showerror("Error", str(e)))
+            
+            finally:
+                # Close progress window
+                def cleanup():
+                    progress_window.destroy()
+                self.root.after(0, cleanup)
+        
+        # Start conversion in separate thread
+        threading.Thread(target=conversion_thread, daemon=True).start()
+    
+    def get_parallel_jobs(self):
+        try:
+            return max(1, int(self.parallel_jobs.get()))
+        except ValueError:
+            return 1
+    
+    def update_parallel_jobs(self):
+        if self.job_queue:
+            self.job_queue.set_max_workers(self.get_parallel_jobs())
+    
+    def add_to_queue(self):
+        """Queue the current media list and settings as a background job"""
+        if not self.media:
+            messagebox.showerror("Error", "Please select media files first!")
+            return
+        
+        settings = self.get_settings()
+        if settings is None:
+            return
+        
+        save_path = filedialog.asksaveasfilename(
+            defaultextension=".mp4",
+            initialdir=str(Path(self.media[0].path).parent.parent),
+            title="Save Video As",
+            filetypes=[("MP4 files", "*.mp4")]
+        )
+        
+        if not save_path:
+            return
+        
+        if self.job_queue is None:
+            self.job_queue = JobQueue(
+                max_workers=self.get_parallel_jobs(),
+                on_update=lambda job: self.queue_dispatcher.post(job.id, job)
+            )
+        
+        self.show_queue_window()
+        self.job_queue.submit(Job(self.media.paths, self.media.file_types, settings, save_path))
+    
+    def show_queue_window(self):
+        if self.queue_window is None or not self.queue_window.winfo_exists():
+            self.queue_window = QueueWindow(self.root, self.job_queue)
+        self.queue_window.deiconify()
+        self.queue_window.lift()
+    
+    def on_job_update(self, job):
+        if self.queue_window is not None and self.queue_window.winfo_exists():
+            self.queue_window.update_job(job)
+        if job.status == FAILED:
+            messagebox.showerror("Error", f"{job.name} failed: {job.error}")
+    
+    def on_close(self):
+        """Cancel running conversions before quitting so nothing is left behind"""
+        engine = None
+        if self.progress_window is not None and self.progress_window.winfo_exists():
+            engine = self.progress_window.engine
+        jobs_running = self.job_queue is not None and any(
+            job.status == RUNNING or job in self.job_queue.pending
+            for job in self.job_queue.jobs
+        )
+        if engine or jobs_running:
+            if not messagebox.askyesno(
+                "Quit", "A conversion is still running. Cancel it and quit?"
+            ):
+                return
+            if engine:
+                engine.cancel()
+            if self.job_queue is not None:
+                self.job_queue.cancel_all()
+            # Give the engines a moment to clean up their temp files, the
+            # atexit hook takes care of anything still left
+            self.root.after(500, self.root.destroy)
+            return
+        self.root.destroy()
+    
+    def run(self):
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.mainloop()
+        self.probe_executor.shutdown(wait=False, cancel_futures=True)
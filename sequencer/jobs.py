@@ -0,0 +1,221 @@
+import copy
+import itertools
+import os
+import threading
+import time
+from collections import deque
+
+from .engine import ConversionCancelled, ConversionEngine
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+_job_ids = itertools.count(1)
+
+def format_duration(seconds):
+    """Format seconds as MM:SS, or H:MM:SS for long jobs"""
+    seconds = max(0, int(seconds))
+    hours, remainder = divmod(seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+class Job:
+    """One output video: a media list, its settings and where it's written"""
+
+    def __init__(self, media_files, file_types, settings, output_path, name=None):
+        self.id = next(_job_ids)
+        self.media_files = list(media_files)
+        self.file_types = list(file_types)
+        self.settings = settings
+        self.output_path = output_path
+        self.name = name or os.path.basename(output_path)
+        self.status = PENDING
+        self.status_text = "Queued"
+        self.progress = 0.0  # Percent
+        self.frame = 0
+        self.total_frames = 0
+        self.eta = None  # Seconds remaining, None until known
+        self.speed = None  # Encode speed as a multiple of real time
+        self.error = None
+        self.start_time = None
+        self.end_time = None
+        self.engine = None
+        self.summary = None  # ConversionEngine.summary once the job has ended
+        self.cancel_requested = False
+        self.paused = False
+        self.paused_since = None
+        self.paused_time = 0.0  # Seconds spent paused, left out of the ETA
+
+    def update_progress(self, update):
+        self.progress = min(100.0, update.percent)
+        self.status_text = update.detail or self.status_text
+        if update.frame is not None:
+            self.frame = update.frame
+            self.total_frames = update.total_frames
+        if update.speed is not None:
+            self.speed = update.speed
+        if self.progress > 0:
+            elapsed = time.time() - self.start_time - self.paused_time
+            self.eta = elapsed * (100 - self.progress) / self.progress
+
+class JobQueue:
+    """Runs queued jobs with at most max_workers ffmpeg encodes at a time.
+
+    The CPU thread budget is split evenly between the running workers and
+    passed to ffmpeg as -threads, so parallel jobs don't oversubscribe the
+    machine. on_update(job) is called from worker threads whenever a job's
+    status or progress changes. on_event(event) gets every job's
+    instrumentation events with the job's name added as 'job'.
+    """
+
+    def __init__(self, max_workers=1, thread_budget=None, on_update=None, progress_interval=0.25,
+                 on_event=None):
+        self.max_workers = max(1, max_workers)
+        self.thread_budget = thread_budget or os.cpu_count() or 1
+        self.on_update = on_update
+        self.progress_interval = progress_interval
+        self.on_event = on_event
+        self.jobs = []
+        self.pending = deque()
+        self.running = set()
+        self.condition = threading.Condition()
+
+    def threads_per_job(self):
+        return max(1, self.thread_budget // self.max_workers)
+
+    def set_max_workers(self, max_workers):
+        with self.condition:
+            self.max_workers = max(1, max_workers)
+        self.dispatch()
+
+    def submit(self, job):
+        with self.condition:
+            self.jobs.append(job)
+            self.pending.append(job)
+        self.notify(job)
+        self.dispatch()
+        return job
+
+    def dispatch(self):
+        """Start pending jobs while there are free worker slots"""
+        with self.condition:
+            while self.pending and len(self.running) < self.max_workers:
+                job = self.pending.popleft()
+                self.running.add(job)
+                # Set here so a cancel before the worker starts isn't lost
+                job.status = RUNNING
+                job.start_time = time.time()
+                threading.Thread(target=self.run_job, args=(job,), daemon=True).start()
+
+    def notify(self, job):
+        if self.on_update:
+            self.on_update(job)
+
+    def run_job(self, job):
+        settings = copy.copy(job.settings)
+        settings.threads = self.threads_per_job()
+
+        last_notify = [0.0]
+
+        def on_progress(update):
+            job.update_progress(update)
+            # Progress can arrive many times a second, only pass some of it on
+            now = time.time()
+            if now - last_notify[0] >= self.progress_interval:
+                last_notify[0] = now
+                self.notify(job)
+
+        def on_status(text):
+            job.status_text = text
+            self.notify(job)
+
+        def on_event(event):
+            if self.on_event:
+                event['job'] = job.name
+                self.on_event(event)
+
+        try:
+            with self.condition:
+                job.engine = ConversionEngine(
+                    job.media_files, job.file_types, settings,
+                    on_progress=on_progress, on_status=on_status, on_event=on_event
+                )
+                if job.cancel_requested:
+                    job.engine.cancel()
+            self.notify(job)
+            job.engine.run(job.output_path)
+            job.status = DONE
+            job.status_text = "Done"
+            job.progress = 100.0
+            job.eta = 0
+        except ConversionCancelled:
+            job.status = CANCELLED
+            job.status_text = "Cancelled"
+        except Exception as e:
+            job.status = FAILED
+            job.status_text = "Failed"
+            job.error = str(e)
+        finally:
+            job.end_time = time.time()
+            job.paused = False
+            if job.engine:
+                job.summary = job.engine.summary
+            self.notify(job)
+            with self.condition:
+                self.running.discard(job)
+                self.condition.notify_all()
+            self.dispatch()
+
+    def cancel(self, job):
+        """Drop a queued job, or stop a running one and clean up after it"""
+        with self.condition:
+            if job in self.pending:
+                self.pending.remove(job)
+                job.status = CANCELLED
+                job.status_text = "Cancelled"
+                engine = None
+            elif job.status == RUNNING:
+                job.cancel_requested = True
+                engine = job.engine
+            else:
+                return
+        if engine:
+            engine.cancel()
+        self.notify(job)
+        with self.condition:
+            self.condition.notify_all()
+
+    def cancel_all(self):
+        with self.condition:
+            jobs = list(self.pending) + list(self.running)
+        for job in jobs:
+            self.cancel(job)
+
+    def pause(self, job):
+        """Suspend a running job's ffmpeg processes"""
+        if job.status != RUNNING or job.engine is None or job.paused:
+            return
+        job.engine.pause()
+        job.paused = True
+        job.paused_since = time.time()
+        self.notify(job)
+
+    def resume(self, job):
+        if not job.paused:
+            return
+        job.paused = False
+        job.paused_time += time.time() - job.paused_since
+        job.engine.resume()
+        self.notify(job)
+
+    def wait(self):
+        """Block until every submitted job has finished"""
+        with self.condition:
+            while self.pending or self.running:
+                # Wake up now and then so Ctrl+C gets through on Windows
+                self.condition.wait(0.5)
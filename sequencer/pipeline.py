@@ -0,0 +1,151 @@
+"""Decode images in worker processes and feed them to ffmpeg as raw video.
+
+Used for image sequences that need per-frame work (mixed sizes, alpha)
+so decoding scales across every core while ffmpeg only has to encode.
+Needs Pillow, which is imported lazily so the rest of the app works
+without it.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+# Shared memory blocks attached in this worker process, by name
+_attached = {}
+
+def pillow_available():
+    try:
+        import PIL.Image  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def attach_shared_memory(name):
+    """Attach to a block created by the parent without taking ownership of it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always tracks it, but pool workers share the parent's
+        # resource tracker so the block is still only unlinked once
+        return shared_memory.SharedMemory(name=name)
+
+# PIL resampling filter for each of conform.SCALERS. PIL has no spline
+# filter, bicubic is the closest.
+RESAMPLE_FILTERS = {
+    'lanczos': 'LANCZOS',
+    'bicubic': 'BICUBIC',
+    'bilinear': 'BILINEAR',
+    'spline': 'BICUBIC',
+    'area': 'BOX',
+    'neighbor': 'NEAREST',
+}
+
+def decode_frame(path, slot_name, width, height, mode='fit', scaler='lanczos'):
+    """Decode one image into an rgb24 slot conformed to width x height.
+
+    mode is one of conform.CONFORM_MODES and scaler one of conform.SCALERS.
+    Runs in a worker process. Transparent areas are flattened onto black.
+    """
+    from PIL import Image
+    resample = getattr(Image, RESAMPLE_FILTERS.get(scaler, 'LANCZOS'))
+
+    block = _attached.get(slot_name)
+    if block is None:
+        block = _attached[slot_name] = attach_shared_memory(slot_name)
+
+    with Image.open(path) as image:
+        image.load()
+        if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+            image = image.convert('RGBA')
+            background = Image.new('RGBA', image.size, (0, 0, 0, 255))
+            image = Image.alpha_composite(background, image)
+        image = image.convert('RGB')
+
+        if image.size != (width, height) and mode == 'fill':
+            image = image.resize((width, height), resample)
+        elif image.size != (width, height):
+            pick = max if mode == 'crop' else min
+            scale = pick(width / image.width, height / image.height)
+            size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+            resized = image.resize(size, resample)
+            image = Image.new('RGB', (width, height))
+            # Negative offsets crop the overflow when mode is crop
+            image.paste(resized, ((width - size[0]) // 2, (height - size[1]) // 2))
+
+        data = image.tobytes()
+    block.buf[:len(data)] = data
+    return path
+
+class FramePipeline:
+    """Decodes files on a process pool and writes them to a pipe in order.
+
+    Frames land in a fixed set of reusable shared-memory slots. Only as
+    many frames as there are slots can be in flight, so a slow encoder
+    holds the decoders back instead of frames piling up in memory.
+    """
+
+    def __init__(self, files, width, height, workers=None, slots_per_worker=2,
+                 mode='fit', scaler='lanczos'):
+        self.files = files
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.scaler = scaler
+        self.workers = workers or os.cpu_count() or 1
+        self.frame_size = width * height * 3
+        self.slots = [
+            shared_memory.SharedMemory(create=True, size=self.frame_size)
+            for _ in range(self.workers * slots_per_worker)
+        ]
+
+    def input_args(self, fps):
+        """ffmpeg arguments for reading the frames from stdin"""
+        return [
+            "-f", "rawvideo",
+            "-pix_fmt", "rgb24",
+            "-s", f"{self.width}x{self.height}",
+            "-framerate", f"{fps:g}",
+            "-i", "-",
+        ]
+
+    def feed(self, pipe, cancelled=None):
+        """Write every frame to pipe in order, then close it"""
+        free_slots = list(range(len(self.slots)))
+        in_flight = {}  # Frame index -> (future, slot)
+        next_submit = 0
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            for index in range(len(self.files)):
+                # Keep every free slot busy with the next frames
+                while free_slots and next_submit < len(self.files):
+                    slot = free_slots.pop()
+                    future = executor.submit(
+                        decode_frame, self.files[next_submit],
+                        self.slots[slot].name, self.width, self.height,
+                        self.mode, self.scaler
+                    )
+                    in_flight[next_submit] = (future, slot)
+                    next_submit += 1
+
+                future, slot = in_flight.pop(index)
+                try:
+                    future.result()
+                except Exception as e:
+                    raise RuntimeError(
+                        f"Could not decode {os.path.basename(self.files[index])}: {e}"
+                    )
+                if cancelled is not None and cancelled.is_set():
+                    return
+                pipe.write(self.slots[slot].buf[:self.frame_size])
+                free_slots.append(slot)
+        finally:
+            # Drop anything still queued if we stopped early
+            executor.shutdown(wait=True, cancel_futures=True)
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+    def close(self):
+        for block in self.slots:
+            block.close()
+            block.unlink()
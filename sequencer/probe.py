@@ -0,0 +1,357 @@
+import json
+import os
+import sqlite3
+import struct
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .system import CREATE_NO_WINDOW, get_data_dir
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp')
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv')
+
+def get_file_type(path):
+    """Classify a path as 'video' or 'image' by its extension"""
+    ext = os.path.splitext(path)[1].lower()
+    return 'video' if ext in VIDEO_EXTENSIONS else 'image'
+
+def read_png_size(f):
+    """Read width/height from the IHDR chunk of a PNG"""
+    header = f.read(24)
+    if len(header) < 24 or header[12:16] != b'IHDR':
+        return None
+    return struct.unpack('>II', header[16:24])
+
+def read_jpeg_size(f):
+    """Walk JPEG markers until a start-of-frame segment is found"""
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b'\xff':
+            byte = f.read(1)
+        while byte == b'\xff':
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        # Standalone markers have no length field
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        # SOF0-SOF15, skipping DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack('>HH', data[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+def read_bmp_size(f):
+    """Read width/height from the DIB header of a BMP"""
+    header = f.read(26)
+    if len(header) < 26:
+        return None
+    dib_size = struct.unpack('<I', header[14:18])[0]
+    if dib_size == 12:  # OS/2 BITMAPCOREHEADER
+        width, height = struct.unpack('<HH', header[18:22])
+    else:
+        width, height = struct.unpack('<ii', header[18:26])
+    # Negative height means a top-down bitmap
+    return abs(width), abs(height)
+
+def read_tiff_size(f):
+    """Read ImageWidth/ImageLength tags from the first TIFF IFD"""
+    header = f.read(8)
+    if len(header) < 8:
+        return None
+    endian = '<' if header[:2] == b'II' else '>'
+    offset = struct.unpack(endian + 'I', header[4:8])[0]
+    f.seek(offset)
+    count_bytes = f.read(2)
+    if len(count_bytes) < 2:
+        return None
+    count = struct.unpack(endian + 'H', count_bytes)[0]
+    width = height = None
+    for _ in range(count):
+        entry = f.read(12)
+        if len(entry) < 12:
+            break
+        tag, field_type = struct.unpack(endian + 'HH', entry[:4])
+        if tag not in (256, 257):
+            continue
+        if field_type == 3:  # SHORT
+            value = struct.unpack(endian + 'H', entry[8:10])[0]
+        else:  # LONG
+            value = struct.unpack(endian + 'I', entry[8:12])[0]
+        if tag == 256:
+            width = value
+        else:
+            height = value
+        if width is not None and height is not None:
+            return width, height
+    return None
+
+def read_image_size(path):
+    """Get image dimensions from the file header without spawning a process"""
+    try:
+        with open(path, 'rb') as f:
+            magic = f.read(4)
+            f.seek(0)
+            if magic == b'\x89PNG':
+                return read_png_size(f)
+            if magic[:2] == b'\xff\xd8':
+                return read_jpeg_size(f)
+            if magic[:2] == b'BM':
+                return read_bmp_size(f)
+            if magic in (b'II*\x00', b'MM\x00*'):
+                return read_tiff_size(f)
+    except (OSError, struct.error):
+        pass
+    return None
+
+IMAGE_CODECS = {
+    '.png': 'png',
+    '.jpg': 'mjpeg',
+    '.jpeg': 'mjpeg',
+    '.bmp': 'bmp',
+    '.tif': 'tiff',
+    '.tiff': 'tiff',
+}
+
+def parse_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def parse_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def parse_rate(value):
+    """Frame rate from an ffprobe fraction such as 30000/1001"""
+    try:
+        num, den = value.split('/')
+        return float(num) / float(den) if float(den) else None
+    except (AttributeError, ValueError):
+        return parse_float(value)
+
+def ffprobe_media(path):
+    """Fall back to ffprobe for videos and formats we can't parse ourselves"""
+    cmd = [
+        'ffprobe',
+        '-v', 'error',
+        '-show_data_hash', 'sha256',
+        '-show_entries',
+        'stream=codec_type,codec_name,profile,level,width,height,pix_fmt,bit_rate,nb_frames,'
+        'r_frame_rate,time_base,extradata_hash,sample_rate,channels:format=duration,bit_rate',
+        '-of', 'json',
+        path
+    ]
+    try:
+        output = subprocess.check_output(cmd, creationflags=CREATE_NO_WINDOW)
+        data = json.loads(output.decode())
+    except (subprocess.CalledProcessError, FileNotFoundError, ValueError):
+        return None
+    streams = data.get('streams') or []
+    # First video and audio stream, images report a single video stream
+    stream = next((s for s in streams if s.get('codec_type') == 'video'), {})
+    audio = next((s for s in streams if s.get('codec_type') == 'audio'), {})
+    fmt = data.get('format', {})
+    bitrate = parse_int(stream.get('bit_rate')) or parse_int(fmt.get('bit_rate'))
+    return {
+        'width': parse_int(stream.get('width')),
+        'height': parse_int(stream.get('height')),
+        'bitrate': bitrate // 1000 if bitrate else None,  # kbps
+        'duration': parse_float(fmt.get('duration')),
+        'nb_frames': parse_int(stream.get('nb_frames')),
+        'pix_fmt': stream.get('pix_fmt'),
+        'codec': stream.get('codec_name'),
+        'profile': stream.get('profile'),
+        'level': parse_int(stream.get('level')),
+        # Hash of the codec's parameter sets (avcC, hvcC...)
+        'extradata_hash': stream.get('extradata_hash'),
+        'fps': parse_rate(stream.get('r_frame_rate')),
+        'time_base': stream.get('time_base'),
+        'audio_codec': audio.get('codec_name'),
+        'audio_sample_rate': parse_int(audio.get('sample_rate')),
+        'audio_channels': parse_int(audio.get('channels')),
+    }
+
+def probe_media(path, file_type):
+    """Get metadata for a single file, reading image headers directly"""
+    if file_type == 'image':
+        size = read_image_size(path)
+        if size:
+            return {
+                'width': size[0],
+                'height': size[1],
+                'bitrate': None,
+                'duration': None,
+                'nb_frames': 1,
+                'pix_fmt': None,
+                'codec': IMAGE_CODECS.get(os.path.splitext(path)[1].lower()),
+                'profile': None,
+                'level': None,
+                'extradata_hash': None,
+                'fps': None,
+                'time_base': None,
+                'audio_codec': None,
+                'audio_sample_rate': None,
+                'audio_channels': None,
+            }
+    return ffprobe_media(path)
+
+class ProbeCache:
+    """Persistent media metadata cache keyed by (path, size, mtime_ns).
+
+    Entries live in a small SQLite database and are evicted least recently
+    used first once the cache grows past max_entries.
+    """
+    VERSION = 3
+
+    def __init__(self, db_path=None, max_entries=200000):
+        if db_path is None:
+            db_path = os.path.join(get_data_dir(), 'probe_cache.sqlite')
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != self.VERSION:
+            # Metadata layout changed, start from scratch
+            self.conn.execute("DROP TABLE IF EXISTS probes")
+            self.conn.execute(f"PRAGMA user_version = {self.VERSION}")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS probes ("
+            "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+            "data TEXT, last_used REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS probes_lru ON probes (last_used)")
+        self.conn.commit()
+
+    def get_many(self, keys):
+        """Look up (path, size, mtime_ns) keys, returning {path: metadata} for hits"""
+        hits = {}
+        wanted = {path: (size, mtime_ns) for path, size, mtime_ns in keys}
+        paths = list(wanted)
+        with self.lock:
+            # Stay well under SQLite's bound parameter limit
+            for i in range(0, len(paths), 500):
+                chunk = paths[i:i + 500]
+                rows = self.conn.execute(
+                    "SELECT path, size, mtime_ns, data FROM probes WHERE path IN "
+                    f"({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for path, size, mtime_ns, data in rows:
+                    if wanted[path] == (size, mtime_ns):
+                        hits[path] = json.loads(data)
+            if hits:
+                now = time.time()
+                self.conn.executemany(
+                    "UPDATE probes SET last_used = ? WHERE path = ?",
+                    [(now, path) for path in hits]
+                )
+                self.conn.commit()
+        return hits
+
+    def put_many(self, entries):
+        """Store [(path, size, mtime_ns, metadata)] and evict if over budget"""
+        if not entries:
+            return
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?)",
+                [(path, size, mtime_ns, json.dumps(data), now)
+                 for path, size, mtime_ns, data in entries]
+            )
+            count = self.conn.execute("SELECT COUNT(*) FROM probes").fetchone()[0]
+            if count > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM probes WHERE path IN "
+                    "(SELECT path FROM probes ORDER BY last_used LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self.conn.commit()
+
+    def invalidate(self, paths=None):
+        """Drop cached entries for the given paths, or everything if None"""
+        with self.lock:
+            if paths is None:
+                self.conn.execute("DELETE FROM probes")
+            else:
+                self.conn.executemany(
+                    "DELETE FROM probes WHERE path = ?",
+                    [(os.path.abspath(path),) for path in paths]
+                )
+            self.conn.commit()
+
+_probe_cache = None
+_probe_cache_lock = threading.Lock()
+
+def get_probe_cache():
+    """Shared cache instance, or None if the cache can't be opened"""
+    global _probe_cache
+    with _probe_cache_lock:
+        if _probe_cache is None:
+            try:
+                _probe_cache = ProbeCache()
+            except (OSError, sqlite3.Error) as e:
+                print(f"Probe cache unavailable: {e}")
+                _probe_cache = False
+        return _probe_cache or None
+
+def probe_files(files, file_types, max_workers=None, use_cache=True):
+    """Probe metadata for every file, consulting the persistent cache first.
+
+    Misses are probed on a bounded thread pool. Returns the list of metadata
+    dicts (None where probing failed) in input order, and the total time
+    spent probing in seconds.
+    """
+    start = time.perf_counter()
+    cache = get_probe_cache() if use_cache else None
+    keys = []
+    for file in files:
+        path = os.path.abspath(file)
+        try:
+            st = os.stat(path)
+            keys.append((path, st.st_size, st.st_mtime_ns))
+        except OSError:
+            keys.append((path, None, None))
+
+    hits = cache.get_many(k for k in keys if k[1] is not None) if cache else {}
+    missing = [i for i, key in enumerate(keys) if key[0] not in hits]
+    results = [hits.get(key[0]) for key in keys]
+
+    if len(missing) == 1:
+        # Not worth spinning up a pool for a single file
+        i = missing[0]
+        results[i] = probe_media(keys[i][0], file_types[i])
+    elif missing:
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            probed = executor.map(
+                probe_media,
+                [keys[i][0] for i in missing],
+                [file_types[i] for i in missing]
+            )
+            for i, metadata in zip(missing, probed):
+                results[i] = metadata
+    if cache and missing:
+        cache.put_many([
+            keys[i] + (results[i],) for i in missing
+            if results[i] is not None and keys[i][1] is not None
+        ])
+
+    return results, time.perf_counter() - start
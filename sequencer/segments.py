@@ -0,0 +1,111 @@
+"""Cache of encoded chunks so unchanged parts of a timeline aren't re-encoded.
+
+A segment is keyed by the size and mtime of every input file in it plus
+the encoder arguments used to make it. Segments are written under a
+temporary name and renamed once ffmpeg succeeds, so anything in the cache
+is complete and a killed job picks up from the segments it finished.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .system import get_data_dir
+
+# Partial segments older than this are left over from killed jobs
+STALE_PARTIAL_SECONDS = 24 * 3600
+
+class SegmentCache:
+    """Encoded segments on disk, evicted least recently used first past max_bytes"""
+
+    def __init__(self, directory=None, max_bytes=10 * 1024 ** 3):
+        if directory is None:
+            directory = os.path.join(get_data_dir(), 'segments')
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+    def key(self, files, encode_args):
+        """Key for a segment made from files with the given ffmpeg arguments.
+
+        Returns None if any file can't be read.
+        """
+        parts = []
+        for file in files:
+            try:
+                st = os.stat(file)
+            except OSError:
+                return None
+            parts.append([os.path.abspath(file), st.st_size, st.st_mtime_ns])
+        data = json.dumps([parts, encode_args])
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.mp4")
+
+    def get(self, key):
+        """Path of a finished segment, or None"""
+        path = self.path(key)
+        try:
+            # Mark it recently used
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def partial_path(self, key, tag):
+        return os.path.join(self.directory, f"{key}.{tag}.partial.mp4")
+
+    def commit(self, partial_path, key):
+        os.replace(partial_path, self.path(key))
+
+    def prune(self):
+        """Evict old segments past max_bytes and remove stale partial files"""
+        with self.lock:
+            now = time.time()
+            segments = []
+            for entry in os.scandir(self.directory):
+                try:
+                    st = entry.stat()
+                    if entry.name.endswith(".partial.mp4"):
+                        if now - st.st_mtime > STALE_PARTIAL_SECONDS:
+                            os.remove(entry.path)
+                    elif entry.name.endswith(".mp4"):
+                        segments.append((st.st_mtime, st.st_size, entry.path))
+                except OSError:
+                    continue
+            total = sum(size for _, size, _ in segments)
+            for _, size, path in sorted(segments):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    def clear(self):
+        with self.lock:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".mp4"):
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+
+_segment_cache = None
+_segment_cache_lock = threading.Lock()
+
+def get_segment_cache():
+    """Shared cache instance, or None if the cache directory can't be used"""
+    global _segment_cache
+    with _segment_cache_lock:
+        if _segment_cache is None:
+            try:
+                _segment_cache = SegmentCache()
+            except OSError as e:
+                print(f"Segment cache unavailable: {e}")
+                _segment_cache = False
+        return _segment_cache or None
@@ -0,0 +1,156 @@
+import os
+import signal
+import subprocess
+import sys
+
+# Only exists on Windows, where it stops console windows flashing up
+CREATE_NO_WINDOW = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+
+def get_ffmpeg_path():
+    if getattr(sys, 'frozen', False):
+        # Running as compiled executable
+        return os.path.join(sys._MEIPASS, 'ffmpeg.exe')
+    else:
+        # Running as script
+        return 'ffmpeg'
+
+def get_data_dir():
+    """Per-user directory for caches that should survive between runs"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    path = os.path.join(base, 'sequence-to-video')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def process_group_args():
+    """Popen arguments that start a child in its own process group.
+
+    The child then doesn't get the terminal's Ctrl+C, so the app decides
+    what to stop, and the whole group can be paused or killed together.
+    """
+    if sys.platform == 'win32':
+        return {'creationflags': CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {'start_new_session': True}
+
+def _windows_process_call(pid, function_name):
+    import ctypes
+    PROCESS_SUSPEND_RESUME = 0x0800
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.OpenProcess(PROCESS_SUSPEND_RESUME, False, pid)
+    if not handle:
+        return
+    try:
+        getattr(ctypes.windll.ntdll, function_name)(handle)
+    finally:
+        kernel32.CloseHandle(handle)
+
+def suspend_process(process):
+    """Pause a process started with process_group_args() and its group"""
+    if process.poll() is not None:
+        return
+    if sys.platform == 'win32':
+        _windows_process_call(process.pid, 'NtSuspendProcess')
+    else:
+        try:
+            os.killpg(process.pid, signal.SIGSTOP)
+        except ProcessLookupError:
+            pass
+
+def resume_process(process):
+    if process.poll() is not None:
+        return
+    if sys.platform == 'win32':
+        _windows_process_call(process.pid, 'NtResumeProcess')
+    else:
+        try:
+            os.killpg(process.pid, signal.SIGCONT)
+        except ProcessLookupError:
+            pass
+
+def kill_process(process):
+    """Kill a process started with process_group_args() and everything in its group"""
+    if process.poll() is not None:
+        return
+    if sys.platform == 'win32':
+        # taskkill also takes out any children
+        subprocess.run(
+            ["taskkill", "/F", "/T", "/PID", str(process.pid)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            creationflags=CREATE_NO_WINDOW
+        )
+    else:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+def read_proc_io(pid):
+    """Byte counters from /proc/<pid>/io, or None where there's no /proc"""
+    try:
+        with open(f"/proc/{pid}/io") as f:
+            return {key: int(value) for key, _, value in
+                    (line.partition(": ") for line in f if ": " in line)}
+    except (OSError, ValueError):
+        return None
+
+def wait_with_usage(process):
+    """Wait for a Popen child, returning (exit code, resource usage or None).
+
+    Where os.wait4 exists the child is reaped with it to get its peak RSS
+    (bytes) and CPU time (seconds). On Linux the bytes it read and wrote,
+    pipes included, come from /proc, read while the child is a zombie.
+    Elsewhere, or if something else reaped the child first, usage is None.
+    """
+    if not hasattr(os, 'wait4'):
+        return process.wait(), None
+    counters = None
+    try:
+        if hasattr(os, 'waitid'):
+            # Wait for the exit without reaping so /proc still has the counters
+            os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+            counters = read_proc_io(process.pid)
+        _, status, rusage = os.wait4(process.pid, 0)
+    except ChildProcessError:
+        # A poll() from another thread got to it first
+        return process.wait(), None
+    process.returncode = os.waitstatus_to_exitcode(status)
+    # ru_maxrss is in bytes on macOS and kilobytes everywhere else
+    rss_unit = 1 if sys.platform == 'darwin' else 1024
+    usage = {
+        'max_rss': rusage.ru_maxrss * rss_unit,
+        'user_cpu': rusage.ru_utime,
+        'system_cpu': rusage.ru_stime,
+        'read_bytes': None,
+        'write_bytes': None,
+    }
+    if counters:
+        usage['read_bytes'] = counters.get('rchar')
+        usage['write_bytes'] = counters.get('wchar')
+    return process.returncode, usage
+
+def open_file_limit():
+    """How many files a child process can have open, or None for no limit"""
+    try:
+        import resource
+    except ImportError:
+        # Windows, where the C runtime allows 512 by default
+        return 512
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    return None if soft == resource.RLIM_INFINITY else soft
+
+def available_memory():
+    """Bytes of memory new processes can use without swapping, or None if unknown"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
@@ -0,0 +1,172 @@
+import sys
+
+def clip_duration(info):
+    """Length of a probed video in seconds, or None if it couldn't be measured"""
+    if not info:
+        return None
+    duration = info.get('duration')
+    if not duration and info.get('nb_frames') and info.get('fps'):
+        duration = info['nb_frames'] / info['fps']
+    return duration or None
+
+class Timeline:
+    """Where each input lands in the output video.
+
+    Images take one output frame each. Video inputs take their probed
+    duration, falling back to nb_frames at the clip's own frame rate.
+    Inputs that couldn't be measured count as a single frame so they
+    still move the progress bar.
+    """
+
+    def __init__(self, file_types, metadata, fps):
+        self.fps = fps
+        self.durations = []  # Output seconds per input
+        self.known = []  # False where the length is a guess
+        for file_type, info in zip(file_types, metadata):
+            duration = 1 / fps if file_type == 'image' else clip_duration(info)
+            self.known.append(bool(duration))
+            self.durations.append(duration or 1 / fps)
+        self.duration = sum(self.durations)
+
+    def __len__(self):
+        return len(self.durations)
+
+    @property
+    def total_frames(self):
+        """Frames in the output at the timeline's frame rate"""
+        return max(1, round(self.duration * self.fps))
+
+    def fraction(self, out_time=None, frame=None):
+        """How far through the output a position is, from 0 to 1.
+
+        out_time in seconds is preferred since it's exact for stream
+        copies too, otherwise the frame count is used.
+        """
+        if out_time is not None and self.duration > 0:
+            return min(1.0, out_time / self.duration)
+        if frame is not None:
+            return min(1.0, frame / self.total_frames)
+        return 0.0
+
+class MediaItem:
+    """One input of a MediaList"""
+
+    __slots__ = ('path', 'file_type', 'info', 'bitrate', 'index')
+
+    def __init__(self, path, file_type):
+        self.path = path
+        # Every item shares one string object per type
+        self.file_type = sys.intern(file_type)
+        self.info = None  # Probed metadata, None until probed
+        self.bitrate = None  # Video bitrate in kbps, None until probed
+        self.index = None  # Row in its MediaList, None once removed
+
+class MediaList:
+    """The ordered inputs of a project with their probed metadata.
+
+    Each input is one small __slots__ record, so long image sequences stay
+    cheap. Totals used by the status line and the default bitrate are
+    updated as items are added, removed and probed, so none of the edits
+    need to scan the whole list. Items know their own row; after a pop or
+    move the rows from the first one touched are renumbered the next time
+    one is looked up.
+    """
+
+    def __init__(self):
+        self.items = []
+        self.bitrate_total = 0
+        self.bitrate_count = 0
+        self.image_count = 0
+        self.unmeasured_count = 0  # Videos without a known length
+        self.video_seconds = 0.0
+        self.stale_from = None  # First row whose item.index may be out of date
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __iter__(self):
+        return iter(self.items)
+
+    @property
+    def paths(self):
+        return [item.path for item in self.items]
+
+    @property
+    def file_types(self):
+        return [item.file_type for item in self.items]
+
+    @property
+    def metadata(self):
+        return [item.info for item in self.items]
+
+    def count(self, item, sign):
+        """Add (sign 1) or remove (sign -1) an item's share of the totals"""
+        if item.file_type == 'image':
+            self.image_count += sign
+            return
+        if item.bitrate is not None:
+            self.bitrate_total += sign * item.bitrate
+            self.bitrate_count += sign
+        duration = clip_duration(item.info)
+        if duration:
+            self.video_seconds += sign * duration
+        else:
+            self.unmeasured_count += sign
+
+    def extend(self, entries):
+        """Append (path, file type) pairs, returning the new items"""
+        new_items = [MediaItem(path, file_type) for path, file_type in entries]
+        for offset, item in enumerate(new_items):
+            item.index = len(self.items) + offset
+            self.count(item, 1)
+        self.items.extend(new_items)
+        return new_items
+
+    def pop(self, index):
+        item = self.items.pop(index)
+        self.count(item, -1)
+        item.index = None
+        self.mark_stale(index)
+        return item
+
+    def move(self, old_index, new_index):
+        self.items.insert(new_index, self.items.pop(old_index))
+        self.mark_stale(min(old_index, new_index))
+
+    def mark_stale(self, row):
+        if self.stale_from is None or row < self.stale_from:
+            self.stale_from = row
+
+    def index_of(self, item):
+        """Row of item, or None if it has been removed"""
+        if item.index is None:
+            return None
+        if self.stale_from is not None and item.index >= self.stale_from:
+            for row in range(self.stale_from, len(self.items)):
+                self.items[row].index = row
+            self.stale_from = None
+        return item.index
+
+    def set_probe(self, item, info, bitrate):
+        """Store probe results for item, returning its index or None if it's gone"""
+        index = self.index_of(item)
+        if index is None:
+            # Deleted while it was being probed
+            return None
+        self.count(item, -1)
+        item.info = info
+        item.bitrate = bitrate
+        self.count(item, 1)
+        return index
+
+    def average_bitrate(self):
+        if not self.bitrate_count:
+            return None
+        return self.bitrate_total // self.bitrate_count
+
+    def duration(self, fps):
+        """Output length in seconds, matching Timeline"""
+        return (self.image_count + self.unmeasured_count) / fps + self.video_seconds
@@ -0,0 +1,124 @@
+"""Local worker processes that run ffmpeg commands for the chunked encoder.
+
+The protocol is one JSON object per line. The engine writes jobs to the
+worker's stdin:
+
+    {"id": 3, "cmd": ["ffmpeg", "-y", ...]}
+
+and the worker answers on stdout with any number of progress lines
+followed by exactly one result line per job:
+
+    {"id": 3, "frame": 120, "out_time": 4.0}
+    {"id": 3, "returncode": 0, "error": "", "stats": {"wall": 4.2, ...}}
+
+stats is FFmpegProcess.stats() for the ffmpeg that ran the job.
+
+A worker runs one job at a time and exits when its stdin is closed.
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+
+from .ffmpeg import FFmpegProcess
+from .system import kill_process, process_group_args, resume_process, suspend_process
+
+def serve(stdin=None, stdout=None):
+    """Run jobs from stdin until it's closed"""
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    lock = threading.Lock()
+
+    def send(message):
+        with lock:
+            stdout.write(json.dumps(message) + "\n")
+            stdout.flush()
+
+    for line in stdin:
+        if not line.strip():
+            continue
+        job = json.loads(line)
+
+        def on_progress(event, job_id=job['id']):
+            send({'id': job_id, 'frame': event.frame, 'out_time': event.out_time})
+
+        stats = None
+        try:
+            # Stay in the worker's process group so pausing or killing the
+            # worker reaches ffmpeg too
+            process = FFmpegProcess(job['cmd'], on_progress=on_progress, new_group=False)
+            returncode = process.wait()
+            error = process.error_output() if returncode != 0 else ""
+            stats = process.stats()
+        except OSError as e:
+            returncode, error = -1, f"Could not run ffmpeg: {e}"
+        send({'id': job['id'], 'returncode': returncode, 'error': error, 'stats': stats})
+
+def worker_command():
+    """Command line that starts a worker process"""
+    if getattr(sys, 'frozen', False):
+        # The bundled executable handles --worker itself
+        return [sys.executable, "--worker"]
+    return [sys.executable, "-m", "sequencer.worker"]
+
+class LocalWorker:
+    """Client side of one worker process"""
+
+    def __init__(self):
+        env = dict(os.environ)
+        package_parent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env['PYTHONPATH'] = os.pathsep.join(
+            p for p in (package_parent, env.get('PYTHONPATH')) if p
+        )
+        self.process = subprocess.Popen(
+            worker_command(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            env=env,
+            **process_group_args()
+        )
+        self.stats = None  # Stats of the last job's ffmpeg, if the worker sent them
+
+    def run(self, job_id, cmd, on_progress=None):
+        """Run cmd on the worker, returning (returncode, error output)"""
+        self.stats = None
+        try:
+            self.process.stdin.write(json.dumps({'id': job_id, 'cmd': cmd}) + "\n")
+            self.process.stdin.flush()
+        except OSError:
+            return -1, "Worker process exited unexpectedly"
+        for line in self.process.stdout:
+            message = json.loads(line)
+            if message.get('id') != job_id:
+                continue
+            if 'returncode' in message:
+                self.stats = message.get('stats')
+                return message['returncode'], message['error']
+            if on_progress:
+                on_progress(message)
+        return -1, "Worker process exited unexpectedly"
+
+    def suspend(self):
+        suspend_process(self.process)
+
+    def resume(self):
+        resume_process(self.process)
+
+    def kill(self):
+        """Kill the worker and the ffmpeg it's running"""
+        kill_process(self.process)
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,111 @@
+"""Per-job scratch directories for intermediate files.
+
+Each conversion gets its own directory so concurrent jobs can't clobber
+each other's files, and it can live on a fast local disk or tmpfs instead
+of wherever the working directory happens to be. Directories are removed
+when the job ends, at interpreter exit for jobs that never got to, and on
+the next start for processes that died without cleaning up.
+"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+PREFIX = "sequence-to-video-"
+OWNER_FILE = "owner.pid"
+
+_active = set()
+_active_lock = threading.Lock()
+_checked_dirs = set()  # Scratch roots already swept for stale workspaces
+
+def default_scratch_dir():
+    """Scratch root from SEQUENCE_TO_VIDEO_SCRATCH, else the system temp dir"""
+    return os.environ.get('SEQUENCE_TO_VIDEO_SCRATCH') or tempfile.gettempdir()
+
+def pid_alive(pid):
+    if sys.platform == 'win32':
+        import ctypes
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        STILL_ACTIVE = 259
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
+        try:
+            exit_code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+            return exit_code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists but belongs to someone else
+        return True
+    return True
+
+def clean_stale_workspaces(scratch_dir=None):
+    """Remove workspaces left behind by processes that no longer exist"""
+    scratch_dir = scratch_dir or default_scratch_dir()
+    try:
+        entries = list(os.scandir(scratch_dir))
+    except OSError:
+        return
+    for entry in entries:
+        if not entry.name.startswith(PREFIX) or not entry.is_dir():
+            continue
+        try:
+            with open(os.path.join(entry.path, OWNER_FILE)) as f:
+                pid = int(f.read().strip())
+        except (OSError, ValueError):
+            continue
+        if pid != os.getpid() and not pid_alive(pid):
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+class Workspace:
+    """A private temp directory for one job"""
+
+    def __init__(self, scratch_dir=None):
+        scratch_dir = os.path.abspath(scratch_dir or default_scratch_dir())
+        os.makedirs(scratch_dir, exist_ok=True)
+        with _active_lock:
+            sweep = scratch_dir not in _checked_dirs
+            _checked_dirs.add(scratch_dir)
+        if sweep:
+            clean_stale_workspaces(scratch_dir)
+        self.directory = tempfile.mkdtemp(prefix=PREFIX, dir=scratch_dir)
+        with open(os.path.join(self.directory, OWNER_FILE), "w") as f:
+            f.write(str(os.getpid()))
+        with _active_lock:
+            _active.add(self)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def used_bytes(self):
+        """Total size of the files in the workspace"""
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    pass
+        return total
+
+    def cleanup(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        with _active_lock:
+            _active.discard(self)
+
+@atexit.register
+def _cleanup_active():
+    # Jobs on daemon threads don't get to run their finally blocks at exit
+    with _active_lock:
+        workspaces = list(_active)
+    for workspace in workspaces:
+        workspace.cleanup()